@@ -0,0 +1,66 @@
+"""
+optional NumPy backend for the magic square grid
+
+if NumPy is installed the grid is stored as a contiguous 2d int64 array and sums/colors are computed with vectorized reductions
+if it is missing (or the grid can't be packed into int64), the plain list[list[int]] grid and pure python path are used instead
+
+importing NumPy takes longer than checking a small square, so it is only imported the first time np is actually used
+"""
+import sys
+from importlib import import_module
+from importlib.util import find_spec
+
+class _Lazy_Module:
+    'stands in for a module and imports it the first time one of its attributes is used'
+    def __init__(self, name: str):
+        self._name = name
+
+    def __getattr__(self, attribute: str):
+        module = import_module(self._name)
+        # next lookups go straight to the module instead of through __getattr__
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attribute)
+
+NUMPY_AVAILABLE = find_spec("numpy") is not None
+np = _Lazy_Module("numpy") if NUMPY_AVAILABLE else None
+BACKENDS = ["numpy", "python"]
+DEFAULT_BACKEND = "numpy" if NUMPY_AVAILABLE else "python"
+
+# squares up to this many bytes (or values) are checked with the python backend unless a backend is asked for,
+# the whole check takes less time than importing NumPy
+SMALL_SQUARE_BYTES = 64 * 1024
+SMALL_SQUARE_CELLS = 10_000
+
+def is_array(grid) -> bool:
+    'returns true if the grid is a NumPy array (numpy backend)'
+    # nothing can be an array if NumPy was never imported, and checking doesn't import it
+    return "numpy" in sys.modules and isinstance(grid, sys.modules["numpy"].ndarray)
+
+def pick_backend(backend: str|None, byte_count: int|None=None, cell_count: int|None=None) -> str:
+    """
+    picks the backend for one square
+    input: backend that was asked for (None for the default), size of the file in bytes and/or number of values if known
+
+    returns: the backend that was asked for, "python" for small squares, or DEFAULT_BACKEND
+    """
+    if backend:
+        return backend
+    if (byte_count is not None and byte_count <= SMALL_SQUARE_BYTES) or (cell_count is not None and cell_count <= SMALL_SQUARE_CELLS):
+        return "python"
+    return DEFAULT_BACKEND
+
+def to_grid(lines: list[list[int]], backend: str=DEFAULT_BACKEND):
+    """
+    converts a list of list of ints into the grid representation of the given backend
+    input: list of list of ints where each list is a row, backend name ("numpy" or "python")
+
+    the values are not checked (numpy would turn strings into ints), grids from callers are checked by algorithm.validate.load_grid first
+    falls back to the list of lists when NumPy is missing, the rows are ragged, or a value does not fit in int64
+    """
+    if backend != "numpy" or not NUMPY_AVAILABLE or is_array(lines):
+        return lines
+
+    try:
+        return np.array(lines, dtype=np.int64)
+    except (ValueError, OverflowError):
+        return lines
@@ -0,0 +1,171 @@
+import json
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from glob import glob
+from os import cpu_count
+from pathlib import Path
+
+from algorithm.binary import BINARY_SUFFIX
+from algorithm.canonical import Canonical_Index, canonical_hash
+from algorithm.errors import Magic_Square_Error
+from algorithm.validate import load_grid
+from algorithm.worker import validate_in_worker, with_stats
+from utils.message import Log
+
+def collect_files(pattern: str) -> list[Path]:
+    """
+    resolves the argument of [--batch] into a list of text files
+    input: a directory (every .txt and .msq inside it), a glob pattern (eg. './test_data/*.txt'), or a comma separated list of files
+
+    returns: list of resolved Paths in input order (directories and globs are sorted by name)
+    """
+    if Path(pattern).is_dir():
+        return sorted(path.resolve() for path in Path(pattern).iterdir() if path.suffix in [".txt", BINARY_SUFFIX] and path.is_file())
+
+    if any(character in pattern for character in "*?["):
+        return [Path(path).resolve() for path in sorted(glob(pattern, recursive=True)) if Path(path).is_file()]
+
+    return [Path(path.strip()).resolve() for path in pattern.split(",") if path.strip()]
+
+def validate_file(text_file: Path, backend: str|None=None, stream: bool=False, cache_dir: Path|None=None, trust_sums: bool=False) -> dict:
+    """
+    validates one magic square text file; this is what every worker process runs
+    input: Path to txt file, backend name (None for the default), whether to read the file one row at a time,
+    directory of the on-disk result cache (None for no cache), whether to trust the sums stored in streamed .msq files
+
+    a bad file is turned into an "error" result instead of stopping the worker (see algorithm.worker.validate_in_worker)
+    returns: dictionary with the result for this file (can be dumped as json)
+    """
+    result = _empty_result(text_file)
+
+    validation, error = validate_in_worker(text_file, backend, stream, cache_dir, trust_sums)
+    if validation is None:
+        result["error"] = error
+        return result
+
+    result.update({
+        "status": "valid" if validation.is_magic_square else "invalid",
+        "size": f"{len(validation.row_sums)}x{len(validation.column_sums)}",
+        "is_magic_square": validation.is_magic_square,
+        "majority_sum": validation.majority_sum,
+        "warnings": validation.warnings,
+    })
+    return result
+
+def canonical_key(text_file: Path, backend: str|None=None) -> str|None:
+    """
+    finds the key of one file in a canonical index (see algorithm.canonical); this is what every worker process runs before validating with [--dedup]
+    input: Path to txt file, backend name (None for the default)
+
+    returns: key, or None if the file can't be read (validating it then reports the error)
+    """
+    try:
+        grid, _ = load_grid(text_file, backend)
+        return canonical_hash(grid)
+    except (Magic_Square_Error, ValueError):
+        return None
+
+def _empty_result(text_file: Path) -> dict:
+    'returns the result of a file before anything is known about it (an "error" until it is validated)'
+    return {
+        "file": text_file.as_posix(),
+        "status": "error",
+        "size": None,
+        "is_magic_square": None,
+        "majority_sum": None,
+        "warnings": [],
+        "error": None,
+        "duplicate_of": None,
+    }
+
+def validate_files(
+    files: list[Path], workers: int|None=None, backend: str|None=None, stream: bool=False, cache_dir: Path|None=None, index_dir: Path|None=None,
+    trust_sums: bool=False,
+) -> list[dict]:
+    """
+    validates every file across a pool of worker processes
+    input: list of Paths to txt files, number of worker processes (default: number of cpus), backend name, whether to stream,
+    directory of the on-disk result cache (None for no cache), directory of the canonical index (None to validate duplicates too),
+    whether to trust the sums stored in streamed .msq files (see algorithm.streaming.stream_sums)
+
+    workers are reused for all files and files are handed out in chunks so the per file overhead stays small
+    with an index, the workers first find the canonical key of every file, then this process adds the keys to the index in input order,
+    so the first of several rotations/reflections is always the same file no matter how the workers are scheduled;
+    a rotation or reflection of a square that was already indexed becomes a "duplicate" result without being validated
+    returns: list of results (see validate_file) in the same order as the input files
+    raises: TypeError if both stream and index_dir are given (finding duplicates needs the whole square), or trust_sums without stream
+    """
+    if stream and index_dir is not None:
+        raise TypeError("duplicates can't be found while streaming, it needs the whole square")
+    if trust_sums and not stream:
+        raise TypeError("stored sums are only trusted while streaming")
+
+    workers = workers or cpu_count() or 1
+
+    # workers record the stages of every file too when instrumentation is enabled, and hand them back with each result
+    with ProcessPoolExecutor(max_workers=workers, initializer=Log.enable_stats if Log.stats_enabled() else None) as pool:
+        results = [None]*len(files)
+        to_validate = list(range(len(files)))
+
+        if index_dir is not None:
+            keys = list(pool.map(canonical_key, files, [backend]*len(files), chunksize=_chunksize(len(files), workers)))
+            index = Canonical_Index(index_dir)
+            to_validate = []
+
+            for i, (text_file, key) in enumerate(zip(files, keys)):
+                first_name = index.add(key, text_file.as_posix()) if key is not None else None
+                # the same file added again (eg. the same batch run twice) is still the first one
+                if first_name is None or first_name == text_file.as_posix():
+                    to_validate.append(i)
+                    continue
+
+                results[i] = _empty_result(text_file)
+                results[i].update({"status": "duplicate", "duplicate_of": first_name})
+
+        remaining = [files[i] for i in to_validate]
+        validated = pool.map(
+            partial(with_stats, validate_file),
+            remaining,
+            [backend]*len(remaining),
+            [stream]*len(remaining),
+            [cache_dir]*len(remaining),
+            [trust_sums]*len(remaining),
+            chunksize=_chunksize(len(remaining), workers),
+        )
+        for i, (result, stages) in zip(to_validate, validated):
+            results[i] = result
+            Log.add_stats(stages)
+
+    return results
+
+def _chunksize(file_count: int, workers: int) -> int:
+    'returns how many files to hand a worker at once: about 4 chunks per worker'
+    return max(1, file_count // (workers * 4))
+
+def print_summary(results: list[dict]):
+    'prints one table with a row for every result and the total count of valid, invalid, duplicate, and error files'
+    name_width = max([len("file")] + [len(Path(result["file"]).name) for result in results])
+
+    print(f"{'#':>5}  {'file':<{name_width}}  {'size':>11}  {'status':<9}  {'majority sum':>12}")
+    for i, result in enumerate(results):
+        majority_sum = "" if result["majority_sum"] is None else result["majority_sum"]
+        print(f"{i+1:>5}  {Path(result['file']).name:<{name_width}}  {result['size'] or '':>11}  {result['status']:<9}  {majority_sum:>12}")
+
+        # errors are useless without saying what went wrong
+        if result["error"]:
+            print(f"{'':>5}  {result['error']}")
+        if result["duplicate_of"]:
+            print(f"{'':>5}  rotation or reflection of '{result['duplicate_of']}'")
+    print()
+
+    statuses = [result["status"] for result in results]
+    Log.info(
+        f"{len(results)} files: {statuses.count('valid')} valid, {statuses.count('invalid')} invalid, "
+        f"{statuses.count('duplicate')} duplicates, {statuses.count('error')} errors"
+    )
+
+def write_json_lines(results: list[dict], json_file: Path):
+    'writes each result as one json object per line'
+    with open(json_file, "w") as file:
+        for result in results:
+            file.write(json.dumps(result) + "\n")
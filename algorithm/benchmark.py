@@ -0,0 +1,302 @@
+"""
+benchmarks every stage of Magic_Square separately across square sizes
+
+python -m algorithm.benchmark [--sizes 3,11,101,...] [--backend numpy|python] [--repeat number]
+                              [--json path/to/results.json] [--baseline path/to/baseline.json] [--threshold 0.2]
+python -m algorithm.benchmark --startup [--repeat number] [--budget milliseconds]
+
+stages: generate, export, read (parse the exported file), sums, colors, print (into memory, not the console)
+every stage is timed on its own (best of --repeat runs), then run once more under tracemalloc for the peak memory it allocates itself
+(the peak is reset right before it, so what the earlier stages allocated is not counted)
+with --baseline, every stage that got slower than the baseline by more than --threshold (0.2 = 20%) is flagged and the exit code is 1
+
+--startup instead times `python app.py -f <3x3 square>` against a bare `python -c pass` and checks which modules it imported:
+the exit code is 1 if it took longer than --budget milliseconds on top of the interpreter or imported any of STARTUP_FORBIDDEN_MODULES
+"""
+import json
+import platform
+import subprocess
+import sys
+import tracemalloc
+from contextlib import contextmanager, redirect_stdout
+from io import StringIO
+from os import chdir, devnull
+from pathlib import Path
+from shutil import rmtree
+from statistics import median
+from sys import argv
+from tempfile import mkdtemp
+from time import perf_counter
+
+from algorithm.backend import DEFAULT_BACKEND, np
+from algorithm.magic_square import Magic_Square
+from utils.message import Log
+
+DEFAULT_SIZES = [3, 11, 101, 501, 1001, 2001]
+STAGES = ["generate", "export", "read", "sums", "colors", "print"]
+
+# stages faster than this are mostly timer noise, they are never flagged as slower
+MIN_COMPARED_SECONDS = 0.001
+
+# time checking a 3x3 square may take on top of starting the interpreter itself
+STARTUP_BUDGET_SECONDS = 0.1
+# modules checking a small square must not import (they are only needed for numpy, batch, cache, parallel, generation, or results)
+STARTUP_FORBIDDEN_MODULES = ["numpy", "concurrent.futures", "multiprocessing", "dataclasses", "json", "hashlib", "datetime"]
+_APP = Path(__file__).resolve().parent.parent / "app.py"
+
+def benchmark_size(size: int, backend: str=DEFAULT_BACKEND, repeat: int=3) -> dict[str, dict[str, float|int]]:
+    """
+    runs every stage for one size of generated magic square
+    input: size of the square, backend name, how many times each stage is timed
+
+    returns: {stage: {"seconds": best time, "peak_bytes": peak memory allocated during the stage}}
+    """
+    results = {}
+    for stage in STAGES:
+        seconds = min(_run_stages(size, backend, stage)[0] for _ in range(repeat))
+
+        tracemalloc.start()
+        try:
+            _, peak_bytes = _run_stages(size, backend, stage)
+        finally:
+            tracemalloc.stop()
+
+        results[stage] = {"seconds": seconds, "peak_bytes": peak_bytes}
+
+    return results
+
+def _run_stages(size: int, backend: str, measured_stage: str) -> tuple[float, int]:
+    """
+    runs every stage up to measured_stage on a fresh Magic_Square, the same way Magic_Square.__init__ would
+    input: size of the square, backend name, stage to time
+
+    the exported file goes into a temporary directory that is removed afterwards
+    while tracemalloc is tracing, its peak is reset right before measured_stage, so the stages before it don't count
+    returns: (seconds measured_stage took, peak bytes it allocated on top of what was allocated before it; 0 if tracemalloc is not tracing)
+    """
+    directory = Path(mkdtemp(prefix="magic_square_benchmark_"))
+    # skip __init__ so each stage can be called (and timed) on its own
+    magic = Magic_Square.__new__(Magic_Square)
+    magic._text_file = None
+    magic._backend = backend
+    magic._size = size
+    magic._export_format = "txt"
+    magic._cache = None
+    magic._jobs = None
+
+    def export():
+        magic._export_magic_square()
+        # read the exported file back like a --file input instead of reusing the generated square
+        magic._size = None
+
+    stages = {
+        "generate": magic._generate_magic_square,
+        "export": export,
+        "read": magic._read_file,
+        "sums": magic._compute_sums,
+        "colors": magic._define_text_color,
+        "print": lambda: magic.print_magic_square(stream=StringIO()),
+    }
+
+    seconds = 0.0
+    peak_bytes = 0
+    # logs of the stages (eg. the odd sided warning) would flood the benchmark output
+    with open(devnull, "w") as null, redirect_stdout(null), _working_directory(directory):
+        try:
+            for stage, run in stages.items():
+                if stage == measured_stage and tracemalloc.is_tracing():
+                    tracemalloc.reset_peak()
+                    allocated_before, _ = tracemalloc.get_traced_memory()
+
+                start = perf_counter()
+                run()
+                if stage == measured_stage:
+                    seconds = perf_counter() - start
+                    if tracemalloc.is_tracing():
+                        _, peak = tracemalloc.get_traced_memory()
+                        peak_bytes = peak - allocated_before
+                    break
+        finally:
+            rmtree(directory, ignore_errors=True)
+
+    return seconds, peak_bytes
+
+@contextmanager
+def _working_directory(directory: Path):
+    'changes the working directory for the duration of the with block (exported squares go into ./generated_magic_squares/)'
+    previous = Path.cwd()
+    chdir(directory)
+    try:
+        yield
+    finally:
+        chdir(previous)
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    compares a run against a stored baseline run
+    input: results and baseline (both as written by run_benchmarks), allowed slowdown (0.2 = 20%)
+
+    only sizes and stages that are in both runs are compared
+    returns: list of messages, one for each stage that got slower by more than threshold
+    """
+    regressions = []
+    for size, stages in results["sizes"].items():
+        for stage, measured in stages.items():
+            base = baseline["sizes"].get(size, {}).get(stage)
+            if base is None or max(measured["seconds"], base["seconds"]) < MIN_COMPARED_SECONDS:
+                continue
+
+            slowdown = measured["seconds"] / base["seconds"] - 1 if base["seconds"] > 0 else float("inf")
+            if slowdown > threshold:
+                regressions.append(
+                    f"size {size} {stage}: {base['seconds']*1000:.2f} ms -> {measured['seconds']*1000:.2f} ms (+{slowdown*100:.0f}%)"
+                )
+
+    return regressions
+
+def run_benchmarks(sizes: list[int], backend: str=DEFAULT_BACKEND, repeat: int=3) -> dict:
+    """
+    benchmarks every size and prints one table row per size as it finishes
+    input: sizes of the squares, backend name, how many times each stage is timed
+
+    returns: dictionary that can be dumped as json ("sizes" keys are strings so they survive a json round trip)
+    """
+    print(f"{'size':>6}  " + "  ".join(f"{stage:>10}" for stage in STAGES) + f"  {'peak MB':>8}")
+
+    results = {
+        "backend": backend,
+        "repeat": repeat,
+        "python": platform.python_version(),
+        "numpy": np.__version__ if np is not None else None,
+        "sizes": {},
+    }
+    for size in sizes:
+        stages = benchmark_size(size, backend, repeat)
+        results["sizes"][str(size)] = stages
+
+        peak_megabytes = max(stage["peak_bytes"] for stage in stages.values()) / 1_000_000
+        print(f"{size:>6}  " + "  ".join(f"{stages[stage]['seconds']*1000:>8.2f}ms" for stage in STAGES) + f"  {peak_megabytes:>8.1f}")
+
+    return results
+
+def measure_startup(repeat: int=15) -> dict:
+    """
+    times how long checking one 3x3 square from the command line takes, from starting python to exiting
+    input: how many times to run it (the median is kept)
+
+    returns: {"seconds": median time of app.py, "interpreter_seconds": median time of a bare interpreter, "modules": modules app.py imported}
+    """
+    directory = Path(mkdtemp(prefix="magic_square_startup_"))
+    text_file = directory / "small.txt"
+    text_file.write_text("8 1 6\n3 5 7\n4 9 2\n")
+
+    def median_seconds(command: list[str]) -> float:
+        times = []
+        for _ in range(repeat):
+            start = perf_counter()
+            subprocess.run(command, capture_output=True, check=True)
+            times.append(perf_counter() - start)
+        return median(times)
+
+    try:
+        command = [sys.executable, str(_APP), "-f", str(text_file)]
+        seconds = median_seconds(command)
+        interpreter_seconds = median_seconds([sys.executable, "-c", "pass"])
+
+        # -X importtime lists every imported module on stderr as "import time: self | cumulative | name"
+        importtime = subprocess.run([sys.executable, "-X", "importtime", *command[1:]], capture_output=True, text=True, check=True).stderr
+        modules = [line.rsplit("|", 1)[1].strip() for line in importtime.splitlines() if line.startswith("import time:") and line.count("|") == 2]
+        # the first line is the header of the table, not a module
+        modules = [module for module in modules if module != "imported package"]
+    finally:
+        rmtree(directory, ignore_errors=True)
+
+    return {"seconds": seconds, "interpreter_seconds": interpreter_seconds, "modules": modules}
+
+def check_startup(startup: dict, budget_seconds: float=STARTUP_BUDGET_SECONDS) -> list[str]:
+    """
+    checks a startup measurement against the budget
+    input: measurement from measure_startup, seconds allowed on top of the bare interpreter
+
+    returns: list of messages, one for each way the budget was broken
+    """
+    problems = []
+    overhead = startup["seconds"] - startup["interpreter_seconds"]
+    if overhead > budget_seconds:
+        problems.append(f"checking a 3x3 square took {overhead*1000:.1f} ms on top of the interpreter (budget: {budget_seconds*1000:.0f} ms)")
+
+    for module in STARTUP_FORBIDDEN_MODULES:
+        if module in startup["modules"]:
+            problems.append(f"checking a 3x3 square imported '{module}'")
+
+    return problems
+
+def _parse_args(args: list[str]) -> dict:
+    'parses the command line arguments of the benchmark (see the module docstring)'
+    options = {
+        "sizes": DEFAULT_SIZES, "backend": DEFAULT_BACKEND, "repeat": None, "json": None, "baseline": None, "threshold": 0.2,
+        "startup": False, "budget": STARTUP_BUDGET_SECONDS,
+    }
+    argv_iter = iter(args)
+
+    for arg in argv_iter:
+        if arg == "--startup":
+            options["startup"] = True
+            continue
+
+        value = next(argv_iter, None)
+        if value is None:
+            Log.fatal(f"Please input an argument after '{arg}'")
+            exit(1)
+
+        if arg == "--sizes":
+            options["sizes"] = [int(size) for size in value.split(",")]
+        elif arg == "--backend":
+            options["backend"] = value
+        elif arg == "--repeat":
+            options["repeat"] = int(value)
+        elif arg == "--json":
+            options["json"] = Path(value).resolve()
+        elif arg == "--baseline":
+            options["baseline"] = Path(value).resolve()
+        elif arg == "--threshold":
+            options["threshold"] = float(value)
+        elif arg == "--budget":
+            options["budget"] = float(value) / 1000
+        else:
+            Log.fatal(f"'{arg}' is not a valid argument")
+            exit(1)
+
+    return options
+
+if __name__ == "__main__":
+    options = _parse_args(argv[1:])
+
+    if options["startup"]:
+        startup = measure_startup(options["repeat"] or 15)
+        Log.info(
+            f"checking a 3x3 square: {startup['seconds']*1000:.1f} ms "
+            f"(interpreter alone: {startup['interpreter_seconds']*1000:.1f} ms, {len(startup['modules'])} modules imported)"
+        )
+
+        problems = check_startup(startup, options["budget"])
+        for problem in problems:
+            Log.fatal(problem)
+        exit(1 if problems else 0)
+
+    results = run_benchmarks(options["sizes"], options["backend"], options["repeat"] or 3)
+
+    if options["json"]:
+        with open(options["json"], "w") as file:
+            json.dump(results, file, indent=2)
+        Log.info(f"results written to '{options['json'].as_posix()}'")
+
+    if options["baseline"]:
+        with open(options["baseline"], "r") as file:
+            regressions = compare(results, json.load(file), options["threshold"])
+
+        for regression in regressions:
+            Log.fatal(f"slower than baseline: {regression}")
+        if regressions:
+            exit(1)
+        Log.info(f"no stage is more than {options['threshold']*100:.0f}% slower than '{options['baseline'].name}'")
@@ -0,0 +1,238 @@
+"""
+compact binary format for magic squares (.msq)
+
+layout (everything little-endian):
+    header (16 bytes): b"MSQ1", version (u8), value size in bytes (u8: 1, 2, 4, or 8), flags (u8), 1 padding byte, order (u64)
+    sums (only if flags & HAS_SUMS): 2*order + 2 int64 values; row sums, column sums, then diagonal_1 '/' and diagonal_2 '\\'
+    values: order*order signed integers of the value size, row by row
+
+values start at a multiple of 8 bytes, so the whole block can be memory-mapped and used as a 2d NumPy array without copying
+"""
+import struct
+import sys
+from array import array
+from pathlib import Path
+from sys import argv
+
+from algorithm.backend import DEFAULT_BACKEND, NUMPY_AVAILABLE, is_array, np
+
+BINARY_SUFFIX = ".msq"
+MAGIC = b"MSQ1"
+VERSION = 1
+
+# flags
+HAS_SUMS = 1
+
+_HEADER = struct.Struct("<4sBBBxQ")
+# array typecodes for each value size; 'q' is 8 bytes on every platform python supports
+_TYPECODES = {1: "b", 2: "h", 4: "i", 8: "q"}
+
+def is_binary(source) -> bool:
+    'returns true if the source is a .msq path or the bytes of a .msq file'
+    if isinstance(source, (str, Path)):
+        return Path(source).suffix == BINARY_SUFFIX
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source[:len(MAGIC)]) == MAGIC
+    return False
+
+def value_size(grid) -> int:
+    """
+    finds the smallest signed integer size every value of the grid fits in
+    input: list of list of ints or 2d NumPy array
+
+    returns: 1, 2, 4, or 8 (bytes)
+    raises: ValueError if a value doesn't fit in 64 bits
+    """
+    if is_array(grid):
+        low, high = (int(grid.min()), int(grid.max())) if grid.size else (0, 0)
+    else:
+        low = min((min(row) for row in grid if row), default=0)
+        high = max((max(row) for row in grid if row), default=0)
+
+    for size in _TYPECODES:
+        limit = 1 << (8*size - 1)
+        if -limit <= low and high < limit:
+            return size
+
+    raise ValueError(f"values from {low} to {high} don't fit in 64 bits")
+
+def write_binary(grid, binary_file: Path, sums: tuple[list[int], list[int], list[int]]|None=None):
+    """
+    writes a square grid as a .msq file
+    input: list of list of ints or 2d NumPy array, Path to write to,
+    (row_sums, column_sums, diagonal_sums) to store in the header (optional, skipped if a sum doesn't fit in int64)
+
+    raises: ValueError if the grid is not a square or a value doesn't fit in 64 bits
+    """
+    order = len(grid)
+    if any(len(row) != order for row in grid):
+        raise ValueError("only square grids can be written as .msq")
+
+    size = value_size(grid)
+    flags = 0
+    sum_bytes = b""
+
+    if sums is not None:
+        all_sums = [*sums[0], *sums[1], *sums[2]]
+        try:
+            sum_bytes = struct.pack(f"<{len(all_sums)}q", *all_sums)
+            flags |= HAS_SUMS
+        except struct.error:
+            # sums that overflow int64 are just not stored, they can always be computed again
+            sum_bytes = b""
+
+    with open(binary_file, "wb") as file:
+        file.write(_HEADER.pack(MAGIC, VERSION, size, flags, order))
+        file.write(sum_bytes)
+
+        if is_array(grid):
+            file.write(np.ascontiguousarray(grid, dtype=f"<i{size}").tobytes())
+            return
+
+        # one array per row keeps memory at O(order) instead of a second copy of the whole square
+        for row in grid:
+            values = array(_TYPECODES[size], row)
+            if sys.byteorder == "big":
+                values.byteswap()
+            file.write(values.tobytes())
+
+def read_header(binary_file: Path) -> tuple[int, int, tuple[list[int], list[int], list[int]]|None]:
+    """
+    reads only the header (and stored sums) of a .msq file, never the values
+    input: Path to .msq file
+
+    returns: (order, value size in bytes, (row_sums, column_sums, diagonal_sums) or None if no sums are stored)
+    raises: ValueError if the file is not a valid .msq file
+    """
+    with open(binary_file, "rb") as file:
+        order, size, flags = _unpack_header(file.read(_HEADER.size))
+
+        if not flags & HAS_SUMS:
+            return order, size, None
+
+        sums = _unpack_sums(file.read(8*(2*order + 2)), order)
+
+    return order, size, sums
+
+def read_binary(source, backend: str=DEFAULT_BACKEND):
+    """
+    reads a .msq file (or its bytes) into a grid
+    input: Path to .msq file or bytes of one, backend name ("numpy" or "python")
+
+    with the numpy backend a file is memory-mapped and used as a 2d array as is (zero copy, read only, in the stored value size)
+    returns: 2d NumPy array (numpy backend) or list of list of ints where each list is a row
+    raises: ValueError if the file is not a valid .msq file or is cut short
+    """
+    if isinstance(source, (str, Path)):
+        with open(source, "rb") as file:
+            order, size, flags = _unpack_header(file.read(_HEADER.size))
+            offset = _values_offset(order, flags)
+
+            if backend == "numpy" and NUMPY_AVAILABLE:
+                _check_length(Path(source).stat().st_size, offset, order, size)
+                if order == 0:
+                    return np.zeros((0, 0), dtype=f"<i{size}")
+                return np.memmap(source, dtype=f"<i{size}", mode="r", offset=offset, shape=(order, order))
+
+            file.seek(offset)
+            data = file.read()
+    else:
+        data = bytes(source)
+        order, size, flags = _unpack_header(data[:_HEADER.size])
+        offset = _values_offset(order, flags)
+        data = data[offset:]
+
+    _check_length(len(data), 0, order, size)
+
+    if backend == "numpy" and NUMPY_AVAILABLE:
+        return np.frombuffer(data, dtype=f"<i{size}", count=order*order).reshape(order, order)
+
+    values = array(_TYPECODES[size])
+    values.frombytes(data[:order*order*size])
+    if sys.byteorder == "big":
+        values.byteswap()
+    return [values[i*order:(i + 1)*order].tolist() for i in range(order)]
+
+def read_binary_rows(binary_file: Path):
+    """
+    yields each row of a .msq file as a list of ints, reading one row at a time (used by algorithm.streaming)
+    input: Path to .msq file
+
+    raises: ValueError if the file is not a valid .msq file or is cut short
+    """
+    with open(binary_file, "rb") as file:
+        order, size, flags = _unpack_header(file.read(_HEADER.size))
+        file.seek(_values_offset(order, flags))
+
+        for _ in range(order):
+            data = file.read(order*size)
+            if len(data) != order*size:
+                raise ValueError(f"'{Path(binary_file).name}' is cut short, expected {order}x{order} values")
+
+            values = array(_TYPECODES[size])
+            values.frombytes(data)
+            if sys.byteorder == "big":
+                values.byteswap()
+            yield values.tolist()
+
+def text_to_binary(text_file: Path, binary_file: Path, backend: str=DEFAULT_BACKEND):
+    'converts a magic square text file into a .msq file (sums are computed and stored in the header)'
+    # imported here since algorithm.parser reads .msq files through this module
+    from algorithm.parser import read_square
+    from algorithm.sums import compute_sums
+
+    grid = read_square(text_file, backend)
+    write_binary(grid, binary_file, compute_sums(grid))
+
+def binary_to_text(binary_file: Path, text_file: Path):
+    'converts a .msq file into a magic square text file in the same format as exported squares'
+    with open(text_file, "w") as file:
+        for row in read_binary_rows(binary_file):
+            file.write(" ".join(map(str, row)) + " \n")
+
+def _unpack_header(header: bytes) -> tuple[int, int, int]:
+    'returns (order, value size, flags) from the 16 header bytes; raises ValueError if they are not a .msq header'
+    if len(header) != _HEADER.size:
+        raise ValueError("file is too short to be a .msq file")
+
+    magic, version, size, flags, order = _HEADER.unpack(header)
+    if magic != MAGIC:
+        raise ValueError("not a .msq file (wrong magic bytes)")
+    if version != VERSION:
+        raise ValueError(f".msq version {version} is not supported (expected {VERSION})")
+    if size not in _TYPECODES:
+        raise ValueError(f"{size} byte values are not supported")
+
+    return order, size, flags
+
+def _unpack_sums(data: bytes, order: int) -> tuple[list[int], list[int], list[int]]:
+    'splits the stored sums into (row_sums, column_sums, diagonal_sums)'
+    if len(data) != 8*(2*order + 2):
+        raise ValueError("file is cut short in its stored sums")
+
+    sums = list(struct.unpack(f"<{2*order + 2}q", data))
+    return sums[:order], sums[order:2*order], sums[2*order:]
+
+def _values_offset(order: int, flags: int) -> int:
+    'returns where the values start: right after the header and the stored sums (both multiples of 8 bytes)'
+    return _HEADER.size + (8*(2*order + 2) if flags & HAS_SUMS else 0)
+
+def _check_length(byte_count: int, offset: int, order: int, size: int):
+    'raises ValueError if there are fewer bytes after offset than order*order values need'
+    if byte_count - offset < order*order*size:
+        raise ValueError(f"file is cut short, expected {order}x{order} values of {size} bytes")
+
+if __name__ == "__main__":
+    # python -m algorithm.binary path/to/input path/to/output
+    # converts .txt to .msq or .msq to .txt depending on the suffix of the input
+    from utils.message import Log
+
+    input_file = Path(argv[1]).resolve()
+    output_file = Path(argv[2]).resolve()
+
+    if is_binary(input_file):
+        binary_to_text(input_file, output_file)
+    else:
+        text_to_binary(input_file, output_file)
+
+    Log.info(f"converted '{input_file.name}' to '{output_file.name}'")
@@ -0,0 +1,160 @@
+import json
+import sys
+from array import array
+from collections import OrderedDict
+from hashlib import blake2b
+from operator import index
+from os import getpid
+from pathlib import Path
+
+from algorithm.backend import is_array, np
+from algorithm.result import Validation_Result
+from algorithm.sums import INT64_MAX
+
+# files are hashed in pieces of this many bytes so they are never fully loaded just to be hashed
+_HASH_CHUNK_SIZE = 1 << 20
+
+def content_hash(source) -> str:
+    """
+    hashes the content of a magic square
+    input: Path/str to txt file, bytes of the text file, or list of list of ints/2d NumPy array of ints
+
+    a file and the bytes of that same file give the same hash; grids are hashed by their shape and values,
+    so the same values as a list of lists or as an array of any integer dtype give the same hash too
+    returns: hex digest
+    raises: ValueError if a grid holds anything but integers
+    """
+    digest = blake2b(digest_size=16)
+
+    if isinstance(source, (str, Path)):
+        with open(source, "rb") as file:
+            while chunk := file.read(_HASH_CHUNK_SIZE):
+                digest.update(chunk)
+
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        digest.update(source)
+
+    else:
+        _hash_grid(source, digest)
+
+    return digest.hexdigest()
+
+def _hash_grid(grid, digest):
+    """
+    adds the shape and values of a grid to a digest
+    input: list of list of ints or 2d NumPy array of ints, blake2b digest
+
+    values are hashed as little-endian int64 for both representations; a grid with a value that doesn't fit in int64 is hashed
+    as the text of its values instead (again the same for both), so no two different grids ever share the bytes they are hashed as
+    raises: ValueError if a grid holds anything but integers
+    """
+    if is_array(grid):
+        if grid.dtype.kind not in "iu":
+            raise ValueError(f"only grids of integers can be hashed, not {grid.dtype}")
+        if grid.size and grid.dtype.kind == "u" and int(grid.max()) > INT64_MAX:
+            return _hash_grid_text(grid.tolist(), digest)
+
+        digest.update(b"grid %d %d\n" % grid.shape)
+        digest.update(np.ascontiguousarray(grid, dtype="<i8").tobytes())
+        return
+
+    rows = []
+    for row in grid:
+        # index() takes ints and NumPy integers alike, and nothing that isn't a whole number
+        try:
+            row = [index(value) for value in row]
+        except TypeError:
+            raise ValueError("only grids of integers can be hashed") from None
+        try:
+            values = array("q", row)
+        except OverflowError:
+            return _hash_grid_text(grid, digest)
+        if sys.byteorder == "big":
+            values.byteswap()
+        rows.append(values.tobytes())
+
+    digest.update(b"grid %d %d\n" % (len(grid), len(grid[0]) if len(grid) else 0))
+    for row in rows:
+        digest.update(row)
+
+def _hash_grid_text(grid: list[list[int]], digest):
+    "adds the shape and the values (as text) of a grid whose values don't all fit in int64 to a digest"
+    digest.update(b"grid text %d %d\n" % (len(grid), len(grid[0]) if len(grid) else 0))
+    for row in grid:
+        digest.update(" ".join(map(str, row)).encode() + b"\n")
+
+class Result_Cache:
+    """
+    This class caches Validation_Result by the content hash of the square that was validated (see content_hash)
+
+    The in-memory tier keeps the most recently used results and drops the least recently used one when it is full.
+    If a directory is given, every result is also written there as a small json file, so results survive restarts (this tier has no size bound).
+    Results only hold the sums and the majority sum, never the square itself.
+    """
+    def __init__(self, max_entries: int=1024, directory: Path|None=None):
+        self._max_entries = max_entries
+        self._memory: OrderedDict[str, Validation_Result] = OrderedDict()
+
+        self._directory = directory
+        if self._directory is not None:
+            Path.mkdir(self._directory, parents=True, exist_ok=True)
+
+        # counts how many lookups were served by each tier
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+
+    def __len__(self) -> int:
+        'returns the number of results in the in-memory tier'
+        return len(self._memory)
+
+    def key(self, source) -> str:
+        'returns the key a source is cached under (see content_hash)'
+        return content_hash(source)
+
+    def get(self, key: str) -> Validation_Result|None:
+        """
+        looks up a result by content hash; memory first, then disk
+        a result found on disk is put back in memory
+
+        returns: the cached Validation_Result or None if it is not cached
+        """
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.hits["memory"] += 1
+            return self._memory[key]
+
+        if self._directory is not None:
+            try:
+                with open(self._directory / f"{key}.json", "r") as file:
+                    result = Validation_Result(**json.load(file))
+            except (OSError, ValueError, TypeError):
+                # missing or unreadable (eg. half written, old format) entries are just a miss
+                result = None
+
+            if result is not None:
+                self.hits["disk"] += 1
+                self._remember(key, result)
+                return result
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, result: Validation_Result):
+        'caches a result under a content hash in memory and, if there is a directory, on disk'
+        self._remember(key, result)
+
+        if self._directory is not None:
+            # write to a temporary file first so a reader never sees a half written entry
+            # the pid keeps batch workers writing the same entry from clobbering each other's temporary file
+            temporary_file = self._directory / f"{key}.json.{getpid()}.tmp"
+            with open(temporary_file, "w") as file:
+                json.dump(result.to_dict(), file)
+            temporary_file.replace(self._directory / f"{key}.json")
+
+    def _remember(self, key: str, result: Validation_Result):
+        'puts a result in the in-memory tier, dropping the least recently used result if it is full'
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+
+        while len(self._memory) > self._max_entries:
+            self._memory.popitem(last=False)
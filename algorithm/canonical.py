@@ -0,0 +1,179 @@
+"""
+canonical (normal) form of a magic square under its 8 symmetries, and an on-disk index of the canonical forms seen so far
+
+a square, its 3 rotations, and the reflections of those 4 are the same magic square; the canonical form is the one of the 8
+that is the smallest when read row by row, so every rotation or reflection of a square has the same canonical form (and hash)
+"""
+import sys
+from array import array
+from hashlib import blake2b
+from os import getpid
+from pathlib import Path
+
+from algorithm.backend import is_array, np
+from algorithm.errors import Duplicate_Square_Error
+
+# every symmetry as (transpose, flip_rows, flip_columns): transpose first, then reverse the order of rows and/or columns
+SYMMETRIES = [(transpose, flip_rows, flip_columns) for transpose in [False, True] for flip_rows in [False, True] for flip_columns in [False, True]]
+
+def canonical_form(grid):
+    """
+    finds the canonical form of a square among its rotations and reflections
+    input: list of list of ints or 2d NumPy array
+
+    candidates are compared one row at a time and dropped as soon as a row is bigger than another candidate's, so a square
+    with distinct values is usually settled by its first row; only symmetric squares have to be compared all the way through (O(n^2))
+    grids that are not square keep their orientation (wide or tall) so 3x5 and 5x3 grids end up with the same shape
+    returns: grid in the same representation as the input (for arrays a view, not a copy)
+    """
+    row_count = len(grid)
+    column_count = len(grid[0]) if row_count else 0
+
+    # transposing changes the shape of a grid that is not a square, keep the symmetries that give a wide (or square) grid
+    candidates = [symmetry for symmetry in SYMMETRIES if (symmetry[0] and row_count >= column_count) or (not symmetry[0] and row_count <= column_count)]
+
+    for i in range(min(row_count, column_count)):
+        if len(candidates) == 1:
+            break
+
+        rows = {symmetry: _row(grid, symmetry, i) for symmetry in candidates}
+        smallest = rows[candidates[0]]
+        for symmetry in candidates[1:]:
+            if _is_less(rows[symmetry], smallest):
+                smallest = rows[symmetry]
+        candidates = [symmetry for symmetry in candidates if not _is_less(smallest, rows[symmetry])]
+
+    return apply_symmetry(grid, candidates[0])
+
+def canonical_hash(grid) -> str:
+    """
+    hashes the canonical form of a square; every rotation and reflection of a square has the same hash
+    input: list of list of ints or 2d NumPy array (both give the same hash for the same values)
+
+    returns: hex digest
+    raises: ValueError if a value doesn't fit in 64 bits
+    """
+    canonical = canonical_form(grid)
+    digest = blake2b(digest_size=16)
+    digest.update(b"canonical %d %d\n" % (len(canonical), len(canonical[0]) if len(canonical) else 0))
+
+    # values are hashed as little-endian int64 for both backends
+    if is_array(canonical):
+        digest.update(np.ascontiguousarray(canonical, dtype="<i8").tobytes())
+        return digest.hexdigest()
+
+    for row in canonical:
+        try:
+            values = array("q", row)
+        except OverflowError as error:
+            raise ValueError("values don't fit in 64 bits") from error
+        if sys.byteorder == "big":
+            values.byteswap()
+        digest.update(values.tobytes())
+
+    return digest.hexdigest()
+
+def _row(grid, symmetry: tuple[bool, bool, bool], i: int):
+    'returns row i of the grid after a symmetry without transforming the rest of the grid'
+    transpose, flip_rows, flip_columns = symmetry
+    row_count = len(grid)
+    column_count = len(grid[0])
+
+    # the transformed grid has the columns of the original as its rows
+    if transpose:
+        source = column_count - 1 - i if flip_rows else i
+        row = grid[:, source] if is_array(grid) else [line[source] for line in grid]
+    else:
+        source = row_count - 1 - i if flip_rows else i
+        row = grid[source]
+
+    return row[::-1] if flip_columns else row
+
+def _is_less(row_1, row_2) -> bool:
+    'returns true if row_1 comes before row_2 when compared value by value (like comparing lists)'
+    if not is_array(row_1):
+        return list(row_1) < list(row_2)
+
+    different = np.flatnonzero(row_1 != row_2)
+    return bool(different.size) and bool(row_1[different[0]] < row_2[different[0]])
+
+def apply_symmetry(grid, symmetry: tuple[bool, bool, bool]):
+    'returns the whole grid after one of SYMMETRIES (for arrays a view, not a copy)'
+    transpose, flip_rows, flip_columns = symmetry
+
+    if is_array(grid):
+        view = grid.T if transpose else grid
+        view = view[::-1] if flip_rows else view
+        return view[:, ::-1] if flip_columns else view
+
+    row_count = len(grid) if not transpose else len(grid[0])
+    return [list(_row(grid, symmetry, i)) for i in range(row_count)]
+
+class Canonical_Index:
+    """
+    This class is an on-disk set of the canonical hashes (see canonical_hash) of every square added to it, for finding squares that are a rotation or reflection of one seen before.
+
+    Every hash is one small file that holds the name of the first square with that canonical form, in a subdirectory named after the first 2 hex digits of the hash (so no directory gets millions of files).
+    Files are created exclusively, so worker processes sharing the directory never both add the same square; checking a square is O(n^2) to hash it plus one file creation.
+    """
+    def __init__(self, directory: Path):
+        self._directory = directory
+        Path.mkdir(self._directory, parents=True, exist_ok=True)
+
+        # counts how many squares this instance added or found to be duplicates
+        self.added = 0
+        self.duplicates = 0
+
+    def key(self, grid) -> str:
+        'returns the key a grid is indexed under (see canonical_hash)'
+        return canonical_hash(grid)
+
+    def first_seen(self, key: str) -> str|None:
+        'returns the name of the first square indexed under key, or None if there is none'
+        try:
+            return self._path(key).read_text()
+        except OSError:
+            return None
+
+    def add(self, key: str, name: str) -> str|None:
+        """
+        adds a key to the index unless it is already there
+        input: key (see key), name of the square (eg. its path) to remember as the first one with this canonical form
+
+        returns: None if the key was added, otherwise the name of the square first indexed under it
+        """
+        path = self._path(key)
+        Path.mkdir(path.parent, exist_ok=True)
+
+        # write the name to a temporary file first so a reader never sees a half written entry
+        temporary_file = path.with_name(f"{key}.{getpid()}.tmp")
+        temporary_file.write_text(name)
+        try:
+            # unlike replace, a hard link fails if the entry already exists, so only one process can add a key
+            path.hardlink_to(temporary_file)
+        except FileExistsError:
+            first_name = self.first_seen(key) or name
+            if first_name != name:
+                self.duplicates += 1
+            return first_name
+        finally:
+            temporary_file.unlink(missing_ok=True)
+
+        self.added += 1
+        return None
+
+    def check(self, grid, name: str):
+        """
+        adds a grid to the index, or raises if a rotation or reflection of it was added before
+        input: list of list of ints or 2d NumPy array, name of the square (eg. its path)
+
+        raises: Duplicate_Square_Error if the index already has its canonical form under another name
+        """
+        first_name = self.add(self.key(grid), name)
+        # the same square checked again (eg. the same batch run twice) is the first one, not a duplicate of itself
+        if first_name is not None and first_name != name:
+            raise Duplicate_Square_Error(f"'{Path(name).name}' is a rotation or reflection of (or the same as) '{first_name}'", first_name)
+
+    def _path(self, key: str) -> Path:
+        'returns the file of a key'
+        return self._directory / key[:2] / key
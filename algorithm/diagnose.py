@@ -0,0 +1,146 @@
+"""
+diagnostic only check of a magic square: is it magic and, if not, which rows, columns, and diagonals are wrong
+
+unlike Magic_Square nothing is colored or printed and the square is not kept, only the sums and the indices of the wrong lines
+a normal square (n*n different consecutive values, eg. 1 to n*n) has to add up to its magic constant on every line,
+so it is checked against that constant directly; only other squares need the majority sum (a Counter over every sum)
+"""
+from algorithm.backend import is_array, np
+from algorithm.sums import compute_sums, find_majority_sum
+from algorithm.validate import load_grid
+from utils.message import Log
+
+class Diagnosis:
+    """
+    This class is the result of diagnose(): the verdict, the sum every line should add up to, and the indices (0 based) of the lines that don't.
+
+    target_sum is the magic constant when the square is normal, the majority sum otherwise (None if every sum is unique, then every line is wrong).
+    """
+    def __init__(
+        self, is_magic_square: bool, target_sum: int|None, is_normal: bool,
+        bad_rows: list[int], bad_columns: list[int], bad_diagonals: list[int], warnings: list[str],
+    ):
+        self.is_magic_square = is_magic_square
+        self.target_sum = target_sum
+        self.is_normal = is_normal
+        self.bad_rows = bad_rows
+        self.bad_columns = bad_columns
+        # 0: diagonal_1 '/', 1: diagonal_2 '\'
+        self.bad_diagonals = bad_diagonals
+        self.warnings = warnings
+
+    def to_dict(self) -> dict:
+        'returns the diagnosis as a dictionary that can be dumped as json'
+        return dict(vars(self))
+
+def diagnose(source, backend: str|None=None, workers: int|None=None) -> Diagnosis:
+    """
+    finds out if a square is magic and which of its lines are not, without any per value work past reading and summing it
+    input: Path/str to txt/msq file, bytes of the text/msq file, or list of list of ints/2d NumPy array;
+    backend name (None for the default); number of worker processes to split the sums across (None for one process, see algorithm.parallel)
+
+    returns: Diagnosis
+    raises: Missing_File_Error, Parse_Error, or Shape_Error (all subclasses of Magic_Square_Error)
+    """
+    with Log.stage("read") as stage:
+        grid, warnings = load_grid(source, backend)
+        row_count = len(grid)
+        column_count = len(grid[0])
+        stage.add(cells=row_count*column_count)
+
+    with Log.stage("sums", cells=row_count*column_count):
+        if workers:
+            from algorithm.parallel import parallel_sums
+            row_sums, column_sums, diagonal_sums = parallel_sums(grid, workers)
+        else:
+            row_sums, column_sums, diagonal_sums = compute_sums(grid)
+
+    with Log.stage("distinct", cells=row_count*column_count):
+        first_value = normal_start(grid)
+
+    is_normal = first_value is not None
+    if is_normal:
+        # the values first_value to first_value + n*n - 1 add up to n*n*first_value + n*n*(n*n - 1)/2, split evenly across n rows
+        # (n*(n*n + 1)/2 for the usual 1 to n*n)
+        target_sum = row_count*first_value + row_count*(row_count*row_count - 1)//2
+    else:
+        with Log.stage("majority", sums=row_count + column_count + 2):
+            target_sum, _ = find_majority_sum(row_sums + column_sums + diagonal_sums)
+
+    bad_rows = [i for i, row_sum in enumerate(row_sums) if row_sum != target_sum]
+    bad_columns = [i for i, column_sum in enumerate(column_sums) if column_sum != target_sum]
+    bad_diagonals = [i for i, diagonal_sum in enumerate(diagonal_sums) if diagonal_sum != target_sum]
+
+    return Diagnosis(
+        is_magic_square=not (bad_rows or bad_columns or bad_diagonals),
+        target_sum=target_sum,
+        is_normal=is_normal,
+        bad_rows=bad_rows,
+        bad_columns=bad_columns,
+        bad_diagonals=bad_diagonals,
+        warnings=warnings,
+    )
+
+def normal_start(grid) -> int|None:
+    """
+    checks if a square holds n*n different consecutive values (a normal square, eg. 1 to n*n, or 0 to n*n - 1 like generated squares)
+    input: list of list of ints or 2d NumPy array
+
+    the smallest and biggest value have to be exactly n*n - 1 apart, then one bit per possible value is set
+    and the check stops at the first value whose bit was already set (a repeated value)
+    returns: the smallest value, or None if the square is not normal
+    """
+    row_count = len(grid)
+    if row_count != len(grid[0]):
+        return None
+    cell_count = row_count*row_count
+
+    if is_array(grid):
+        low, high = int(grid.min()), int(grid.max())
+        if high - low != cell_count - 1:
+            return None
+
+        seen = np.zeros(cell_count, dtype=bool)
+        # subtracting in the grid's own dtype could overflow (eg. int8 values from a .msq file)
+        seen[np.subtract(grid, low, dtype=np.intp).ravel()] = True
+        # n*n values spread over n*n bits only set all of them if no value repeats
+        return low if seen.all() else None
+
+    low = min(min(row) for row in grid)
+    high = max(max(row) for row in grid)
+    if high - low != cell_count - 1:
+        return None
+
+    seen = bytearray(cell_count)
+    for row in grid:
+        for value in row:
+            if seen[value - low]:
+                return None
+            seen[value - low] = 1
+    return low
+
+def log_diagnosis(diagnosis: Diagnosis, name: str):
+    """
+    logs the verdict of a diagnosis and, for a square that is not magic, its wrong lines (1 based, like the printed square)
+    input: Diagnosis, name of the square used in messages (eg. the file name)
+    """
+    if diagnosis.is_normal:
+        target = f"{diagnosis.target_sum}, the magic constant of its values"
+    else:
+        target = f"{diagnosis.target_sum}, the majority sum (its values are not all different and consecutive)"
+
+    if diagnosis.is_magic_square:
+        Log.info(f"'{name}' is a magic square: every line adds up to {target}")
+        return
+
+    if diagnosis.target_sum is None:
+        Log.fatal(f"'{name}' is not a magic square, every sum is unique so there is no majority sum to compare with")
+        return
+
+    Log.fatal(f"'{name}' is not a magic square, every line should add up to {target}")
+    for kind, indices in [("rows", diagnosis.bad_rows), ("columns", diagnosis.bad_columns)]:
+        if indices:
+            Log.info(f"{kind} that don't: {', '.join(str(i + 1) for i in indices)}")
+    if diagnosis.bad_diagonals:
+        diagonal_names = ["1 (/)", "2 (\\)"]
+        Log.info(f"diagonals that don't: {', '.join(diagonal_names[i] for i in diagnosis.bad_diagonals)}")
@@ -0,0 +1,169 @@
+from collections import Counter, defaultdict
+
+from algorithm.backend import is_array, np
+from algorithm.magic_square import Magic_Square
+from algorithm.sums import INT64_MAX
+
+class Sum_Counter:
+    """
+    This class counts how many rows, columns, and diagonals have each sum, and keeps track of the most common sum.
+
+    Moving one line from one sum to another is O(1): sums are also grouped by how many times they occur, so the highest count is always known without going through every sum.
+    """
+    def __init__(self, sums: list[int]):
+        self._counts = Counter(sums)
+        # {count: set of sums that occur exactly count times}
+        self._sums_by_count = defaultdict(set)
+        for line_sum, count in self._counts.items():
+            self._sums_by_count[count].add(line_sum)
+        self._max_count = max(self._counts.values())
+
+    @property
+    def distinct_count(self) -> int:
+        'returns how many different sums there are'
+        return len(self._counts)
+
+    def move(self, old_sum: int, new_sum: int):
+        'moves one line whose sum changed from old_sum to new_sum'
+        if old_sum == new_sum:
+            return
+        self._add(new_sum)
+        self._remove(old_sum)
+
+    def majority(self, preferred_sum: int|None=None) -> tuple[int|None, int]:
+        """
+        finds the most common sum (same as algorithm.sums.find_majority_sum)
+        input: sum to keep as the majority if it is tied for the most common (so the majority doesn't jump around between ties)
+
+        returns: (majority_sum, majority_sum_count); majority_sum is None if all sums are unique values
+        """
+        if self._max_count == 1:
+            return None, 1
+
+        most_common = self._sums_by_count[self._max_count]
+        if preferred_sum in most_common:
+            return preferred_sum, self._max_count
+        return next(iter(most_common)), self._max_count
+
+    def _add(self, line_sum: int):
+        count = self._counts[line_sum]
+        if count:
+            self._discard(count, line_sum)
+
+        self._counts[line_sum] = count + 1
+        self._sums_by_count[count + 1].add(line_sum)
+        self._max_count = max(self._max_count, count + 1)
+
+    def _remove(self, line_sum: int):
+        count = self._counts[line_sum]
+        self._discard(count, line_sum)
+
+        if count == 1:
+            del self._counts[line_sum]
+        else:
+            self._counts[line_sum] = count - 1
+            self._sums_by_count[count - 1].add(line_sum)
+
+        # the sum that was removed went down to count - 1, so that's the new highest count if nothing else had the old one
+        if count == self._max_count and not self._sums_by_count.get(count):
+            self._max_count = count - 1
+
+    def _discard(self, count: int, line_sum: int):
+        self._sums_by_count[count].discard(line_sum)
+        if not self._sums_by_count[count]:
+            del self._sums_by_count[count]
+
+class Editable_Magic_Square(Magic_Square):
+    """
+    This class is a Magic_Square whose values can be changed one at a time without validating the whole square again.
+
+    Every edit updates the sums of the row, column, and diagonals of the value and the count of each sum in O(1), so is_magic_square and the majority sum are always up to date.
+    Text colors come from the sets of rows/columns/diagonals whose sum is not equal to the majority sum, so an edit only has to update those sets for the lines it went through (O(1)), unless the majority sum itself changed (then every line has to be checked again, O(n)).
+
+    Edits only change the square in memory, not the text file it was read from.
+    """
+    def __init__(self, args: dict[str : str|int|None]):
+        super().__init__(args)
+
+        # sums served from a cache are shared with the cache, edits must not change them
+        self._row_sums = list(self._row_sums)
+        self._column_sums = list(self._column_sums)
+        self._diagonal_sums = list(self._diagonal_sums)
+        # .msq files are memory-mapped read only and can hold values smaller than int64, edits need an int64 copy of their own
+        if is_array(self._lines) and (not self._lines.flags.writeable or self._lines.dtype != np.int64):
+            self._lines = self._lines.astype(np.int64)
+
+        self._sum_counter = Sum_Counter(self.sums)
+
+    def _needs_values(self, args: dict[str : str|int|None]) -> bool:
+        'returns true: edits need the values of the square even when its result is cached'
+        return True
+
+    def set_value(self, row: int, column: int, value: int):
+        """
+        changes the value at a position and updates all sums, the verdict, and the text colors
+        input: row and column index (0 based), new value
+
+        raises: IndexError if the position is outside of the square (negative indices are not allowed)
+        modifies: self._lines, self._sums, self._row_sums, self._column_sums, self._diagonal_sums,
+        self._is_magic_square, self._majority_sum, self._majority_sum_count, self._bad_rows, self._bad_columns, self._bad_diagonals
+        """
+        if not (0 <= row < self.row_count and 0 <= column < self.column_count):
+            raise IndexError(f"({row}, {column}) is outside of the {self.row_count}x{self.column_count} square")
+
+        value = int(value)
+        delta = value - int(self._lines[row][column])
+        if delta == 0:
+            return
+
+        # an int64 array can't hold the value, the square goes back to python ints (sums always are)
+        if is_array(self._lines) and not -INT64_MAX - 1 <= value <= INT64_MAX:
+            self._lines = self._lines.tolist()
+
+        self._lines[row][column] = value
+
+        self._add_to_sum(self._row_sums, row, f"row_{row+1}", delta)
+        self._add_to_sum(self._column_sums, column, f"column_{column+1}", delta)
+
+        # the diagonal positions compute_sums adds up (row[len(row)-1-i] and row[i]), the same ones _cell_color colors
+        changed_diagonals = []
+        # first diagonal: /
+        if column == (self.column_count-1) - row:
+            self._add_to_sum(self._diagonal_sums, 0, "diagonal_1", delta)
+            changed_diagonals.append(0)
+        # second diagonal: \
+        if column == row:
+            self._add_to_sum(self._diagonal_sums, 1, "diagonal_2", delta)
+            changed_diagonals.append(1)
+
+        self._is_magic_square = self._sum_counter.distinct_count == 1
+
+        majority_sum, self._majority_sum_count = self._sum_counter.majority(self._majority_sum)
+        if majority_sum != self._majority_sum:
+            # every line might have gone from good to bad or the other way around
+            self._majority_sum = majority_sum
+            self._bad_rows = {i for i, row_sum in enumerate(self.row_sums) if row_sum != majority_sum}
+            self._bad_columns = {i for i, column_sum in enumerate(self.column_sums) if column_sum != majority_sum}
+            self._bad_diagonals = {i for i, diagonal_sum in enumerate(self.diagonal_sums) if diagonal_sum != majority_sum}
+            return
+
+        # only the lines that went through the edited value changed their sum
+        self._mark(self._bad_rows, row, self.row_sums[row] != majority_sum)
+        self._mark(self._bad_columns, column, self.column_sums[column] != majority_sum)
+        for diagonal in changed_diagonals:
+            self._mark(self._bad_diagonals, diagonal, self.diagonal_sums[diagonal] != majority_sum)
+
+    def _add_to_sum(self, line_sums: list[int], index: int, key: str, delta: int):
+        'adds delta to one row/column/diagonal sum and moves it in the sum counter'
+        old_sum = line_sums[index]
+        line_sums[index] = old_sum + delta
+        self._sums[key] = old_sum + delta
+        self._sum_counter.move(old_sum, old_sum + delta)
+
+    @staticmethod
+    def _mark(bad_lines: set[int], index: int, is_bad: bool):
+        'adds a line to (or removes it from) a set of lines whose sum is not equal to the majority sum'
+        if is_bad:
+            bad_lines.add(index)
+        else:
+            bad_lines.discard(index)
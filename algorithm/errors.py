@@ -0,0 +1,18 @@
+class Magic_Square_Error(Exception):
+    'base class for every error raised while reading or validating a magic square'
+
+class Missing_File_Error(Magic_Square_Error):
+    'the magic square text file does not exist'
+
+class Parse_Error(Magic_Square_Error):
+    'a value in the magic square is not a whole number'
+
+class Shape_Error(Magic_Square_Error):
+    'the magic square is empty, has ragged rows, or is not a square'
+
+class Duplicate_Square_Error(Magic_Square_Error):
+    'the magic square is a rotation or reflection of (or the same as) a square that was already indexed (see algorithm.canonical)'
+    def __init__(self, message: str, first_seen: str):
+        super().__init__(message)
+        # name of the square that was indexed first
+        self.first_seen = first_seen
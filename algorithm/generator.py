@@ -0,0 +1,126 @@
+from operator import add
+
+from algorithm.backend import is_array, np
+
+def siamese_value(size: int, row: int, column: int) -> int:
+    """
+    closed form of the siamese (staircase) method for odd sized magic squares
+    input: odd size, row and column index (0 based)
+
+    gives the exact same value as doing the staircase by hand (values 0 to size*size - 1, starting at the middle column of the first row)
+    returns: the value at that position
+    """
+    half = size // 2
+    return size*((row + column + half + 1) % size) + ((row + 2*column + 1) % size)
+
+def siamese_rows(size: int):
+    """
+    yields each row of the odd sized siamese magic square, top to bottom
+    input: odd size
+
+    every row is a rotation of two fixed rows (the "tens" and "ones" digits in base size),
+    so a row is built from two slices and one map(add, ...) instead of a modulo per value
+    """
+    half = size // 2
+    # row 0 of each digit; row i is row 0 rotated to the left by some offset
+    high = [size*column for column in range(size)]
+    low = [(2*column + 1) % size for column in range(size)]
+
+    for row in range(size):
+        # high digit: (row + column + half + 1) % size
+        high_offset = (row + half + 1) % size
+        # low digit: (row + 2*column + 1) % size, a shift by row is a rotation by row*(half+1) since 2*(half+1) == 1 (mod size)
+        low_offset = (row * (half + 1)) % size
+
+        yield list(map(
+            add,
+            high[high_offset:] + high[:high_offset],
+            low[low_offset:] + low[:low_offset],
+        ))
+
+def fill_siamese(buffer, size: int):
+    """
+    fills a preallocated size x size buffer with the odd sized siamese magic square
+    input: list of lists or 2d NumPy array, odd size
+
+    modifies: buffer
+    """
+    if is_array(buffer):
+        rows = np.arange(size)[:, None]
+        columns = np.arange(size)[None, :]
+        buffer[...] = size*((rows + columns + size//2 + 1) % size) + ((rows + 2*columns + 1) % size)
+        return buffer
+
+    for i, row in enumerate(siamese_rows(size)):
+        buffer[i][:] = row
+    return buffer
+
+def doubly_even_rows(size: int):
+    """
+    yields each row of a doubly even sized (size % 4 == 0) magic square, top to bottom
+    input: size that is a multiple of 4
+
+    the values 0 to size*size - 1 are written in order, then every value on the "diagonals" of each 4x4 block
+    is replaced by its complement (size*size - 1 - value)
+    a position is on a block diagonal when its row and column are both in the middle of the block or both on its edge
+    """
+    last = size*size - 1
+    # whether each column is on the edge (0 or 3) of its 4x4 block
+    column_edges = [column % 4 in (0, 3) for column in range(size)]
+
+    for row in range(size):
+        row_edge = row % 4 in (0, 3)
+        start = size*row
+        yield [
+            last - (start + column) if column_edges[column] == row_edge else start + column
+            for column in range(size)
+        ]
+
+def singly_even_rows(size: int) -> list[list[int]]:
+    """
+    builds a singly even sized (size % 4 == 2) magic square with the strachey method
+    input: size that is even but not a multiple of 4 (minimum: 6)
+
+    the square is split into 4 quadrants, each one is the odd sized siamese square of half the size plus an offset:
+        A (top left) + 0, B (bottom right) + 1 quarter, C (top right) + 2 quarters, D (bottom left) + 3 quarters
+    then some columns are swapped between the top and bottom quadrants so every row, column, and diagonal adds up the same
+    returns: list of rows, top to bottom
+    """
+    half = size // 2
+    quarter = half*half
+    k = (size - 2) // 4
+
+    small = list(siamese_rows(half))
+    # top half is A then C, bottom half is D then B
+    square = [[value for value in row] + [value + 2*quarter for value in row] for row in small]
+    square += [[value + 3*quarter for value in row] + [value + quarter for value in row] for row in small]
+
+    for row in range(half):
+        # the middle row swaps the k columns starting at its middle instead of the leftmost k columns
+        # so the main diagonals keep their sum
+        left_columns = range(1, k + 1) if row == half // 2 else range(k)
+        # the rightmost k - 1 columns
+        right_columns = range(size - k + 1, size)
+
+        for column in [*left_columns, *right_columns]:
+            square[row][column], square[row + half][column] = square[row + half][column], square[row][column]
+
+    return square
+
+def magic_square_rows(size: int):
+    """
+    yields each row of a magic square of any size from 3 up, using the method for that kind of size
+    input: size (minimum: 3)
+
+    odd: siamese staircase, doubly even (multiple of 4): complement pattern, singly even: strachey
+    every method is O(size*size) and gives the values 0 to size*size - 1
+    """
+    if size < 3:
+        raise ValueError(f"there is no magic square of size {size} (minimum: 3)")
+
+    if size % 2 == 1:
+        yield from siamese_rows(size)
+    elif size % 4 == 0:
+        yield from doubly_even_rows(size)
+    else:
+        yield from singly_even_rows(size)
@@ -1,9 +1,32 @@
+import sys
 from pathlib import Path
-from collections import Counter
-from datetime import datetime
-
+from io import StringIO, TextIOBase
+from time import perf_counter
+
+# generation, export, the cache, and parallel sums import what they need when they are used (see the methods below),
+# so checking a small square only imports what checking needs
+from algorithm.backend import pick_backend
+from algorithm.binary import BINARY_SUFFIX
+from algorithm.errors import Magic_Square_Error
+from algorithm.parser import throughput
+from algorithm.shape import check_shape
+from algorithm.sums import compute_sums, find_majority_sum, log_majority_sum
+from algorithm.validate import load_grid
 from utils.message import Log
 
+# only for annotations: algorithm.result imports dataclasses, which checking a small square never needs
+# (a plain constant instead of typing.TYPE_CHECKING, which would import typing)
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from algorithm.result import Validation_Result
+
+# ANSI escape codes (for text color) of a value, indexed by how many of its row/column/diagonals have a sum != majority sum
+# if 0 (value isn't part of a row/column/diagonal whose sum != majority sum), default color
+# if 1 (value is part of ONE of either row/column/diagonal whose sum != majority sum), blue
+# if 2 (value is part of TWO of any combination of row/column/diagonal whose sum != majority sum), yellow
+# if 3 (value is part of THREE OR MORE of any combination of row/column/diagonal whose sum != majority sum), red
+TEXT_COLORS = ["\033[0m", "\033[94m", "\033[93m", "\033[91m"]
+
 class Magic_Square:
     """
     This class allows you to read and process magic squares from a text file, check if they are valid magic squares, and print them with color-coded elements.
@@ -14,51 +37,97 @@ class Magic_Square:
     """
     def __init__(self, args: dict[str : str|int|None]):
         self._text_file = args["file_path"]
+        # "numpy" stores the grid as a 2d int64 array, "python" as a list of lists (see algorithm.backend)
+        # small squares use "python" unless a backend was asked for, they are checked faster than NumPy is imported
+        self._backend = pick_backend(
+            args.get("backend"),
+            # a missing file is reported by _read_file, not here
+            byte_count=args["file_path"].stat().st_size if args.get("file_path") and not args["size"] and args["file_path"].is_file() else None,
+            cell_count=args["size"]*args["size"] if args["size"] else None,
+        )
+
+        self._size = args["size"]
+        # generated squares are exported as "txt" or as "msq" (compact binary, see algorithm.binary)
+        self._export_format = args.get("export_format") or "txt"
+        # results are looked up by the content hash of the square before computing any sums (see algorithm.cache)
+        self._cache = None
+        if args.get("cache_dir"):
+            from algorithm.cache import Result_Cache
+            self._cache = Result_Cache(directory=args["cache_dir"])
+        # number of worker processes the sums of a large square are split across (see algorithm.parallel)
+        self._jobs = args.get("jobs")
 
         # if a size argument was passed, generate magic square
-        if args["size"]:
-            self._size = args["size"]
-
+        if self._size:
             # _generate_magic_square modifies _generated_magic_square
             self._generated_magic_square: list[list[int]]
-            self._generate_magic_square()
+            # stages only record anything when instrumentation is enabled (see Log.enable_stats), the counters that need a stat
+            # of the file are only added then (here and in algorithm.validate and algorithm.streaming)
+            with Log.stage("generate", cells=self._size*self._size):
+                self._generate_magic_square()
 
             # this will replace the self._text_file with the generated magic square text file
-            self._export_magic_square()
-
-        if not self._text_file.exists():
-            Log.fatal(f"File not found: '{self._text_file}'")
-            print("exiting...")
-            exit(1)
-
-        # _read_file modifies _lines
-        self._lines: list[list[int]]
-        self._read_file()
+            with Log.stage("export", cells=self._size*self._size):
+                self._export_magic_square()
+
+        # results are looked up by the content hash of the file before it is parsed, a square that is not printed is then never parsed
+        self._cached_result: Validation_Result|None = None
+        if self._cache is not None:
+            self._cache_key = self._cache.key(self._generated_magic_square if self._size else self._text_file)
+            self._cached_result = self._cache.get(self._cache_key)
+
+        # _read_file modifies _lines (a 2d NumPy array instead when using the numpy backend) and _warnings
+        # _lines stays None for a cached square until something needs its values (see _needs_values)
+        self._lines: list[list[int]]|None = None
+        self._warnings: list[str]
+        if self._cached_result is None or self._needs_values(args):
+            with Log.stage("read") as stage:
+                self._read_file()
+                # a generated square is used as is, nothing is read from its file
+                if Log.stats_enabled():
+                    stage.add(bytes_read=0 if self._size else self._text_file.stat().st_size, cells=self.row_count*self.column_count)
+        else:
+            self._cached_warnings()
 
-        # _compute_sums modifies _sums and _is_magic_square
+        # _compute_sums modifies _sums, _row_sums, _column_sums, _diagonal_sums, _is_magic_square
         self._sums: dict[str:int]
+        self._row_sums: list[int]
+        self._column_sums: list[int]
+        self._diagonal_sums: list[int]
         self._is_magic_square: bool
-        self._compute_sums()
+        with Log.stage("sums", cells=self.row_count*self.column_count):
+            self._compute_sums()
 
-        # _compute_text_color modifies _text_color and _majority_sum
-        self._text_color: list[list[str]]
+        # _define_text_color modifies _bad_rows, _bad_columns, _bad_diagonals, _majority_sum and _majority_sum_count
+        self._bad_rows: set[int]
+        self._bad_columns: set[int]
+        self._bad_diagonals: set[int]
         self._majority_sum: int
+        self._majority_sum_count: int
         self._define_text_color()
+
+        if self._cache is not None and self._cached_result is None:
+            self._cache.put(self._cache_key, self.to_result())
     
     @property
     def is_magic_square(self) -> bool:
         'returns true if the magic square instance is a magic square'
         return self._is_magic_square
     
+    @property
+    def parse_throughput(self) -> float:
+        'returns how fast the text file was parsed in MB/s'
+        return throughput(self._text_file.stat().st_size, self._parse_seconds)
+
     @property
     def row_count(self) -> int:
         'returns the number of rows'
-        return len(self._lines)
+        return len(self._lines) if self._lines is not None else len(self._cached_result.row_sums)
 
     @property
     def column_count(self) -> int:
         'returns the number of columns'
-        return len(self._lines[0])
+        return len(self._lines[0]) if self._lines is not None else len(self._cached_result.column_sums)
 
     @property
     def diagonal_count(self) -> int:
@@ -76,8 +145,7 @@ class Magic_Square:
         returns the sums for each row; top to bottom
         implied order: row_1, row_2, ..., row_n
         """
-        _row_sums = [value for key, value in self._sums.items() if key.startswith("row")]
-        return _row_sums
+        return self._row_sums
     
     @property
     def column_sums(self) -> list[int]:
@@ -85,8 +153,7 @@ class Magic_Square:
         returns the sums for each column; left to right
         implied order: row_1, row_2, ..., column_n
         """
-        _column_sums = [value for key, value in self._sums.items() if key.startswith("column")]
-        return _column_sums
+        return self._column_sums
     
     @property
     def diagonal_sums(self) -> list[int]:
@@ -94,8 +161,7 @@ class Magic_Square:
         returns the sums for both diagonals
         implied order: diagonal_1 '/', and diagonal_2 '\\'
         """
-        _diagonal_sums = [value for key, value in self._sums.items() if key.startswith("diagonal")]
-        return _diagonal_sums
+        return self._diagonal_sums
 
     @property
     def sums(self) -> list[int]:
@@ -105,72 +171,120 @@ class Magic_Square:
         """
         return self.row_sums + self.column_sums + self.diagonal_sums
     
-    def _read_file(self):
+    def canonical_form(self):
+        'returns the square as the smallest of its rotations and reflections, the same for all 8 of them (see algorithm.canonical)'
+        from algorithm.canonical import canonical_form
+        self._read_values()
+        return canonical_form(self._lines)
+
+    def to_result(self) -> "Validation_Result":
+        'returns the sums and verdict of this magic square as a Validation_Result (the same result algorithm.validate.validate gives)'
+        # dataclasses take longer to import than checking a small square, so results are only imported when one is asked for
+        from algorithm.result import Validation_Result
+        return Validation_Result(
+            is_magic_square=self.is_magic_square,
+            row_sums=self.row_sums,
+            column_sums=self.column_sums,
+            diagonal_sums=self.diagonal_sums,
+            majority_sum=self._majority_sum,
+            majority_sum_count=self._majority_sum_count,
+            warnings=self._warnings,
+        )
+
+    def _needs_values(self, args: dict[str : str|int|None]) -> bool:
+        'returns true if the values of the square are needed even when its result is cached (only to print it)'
+        return bool(args.get("print_command"))
+
+    def _cached_warnings(self):
         """
-        takes a file path to a magic square txt file and computes the rows and columns based on data read from file
-        input: Path to txt file
+        logs the warnings of a cached square without reading it; the shape comes from its cached sums
 
-        modifies: self._lines
+        modifies: self._warnings
         """
-        with open(self._text_file, "r") as file:
-            # outer comprehension outputs string for each line in the file
-            # inner comprehension takes that ouputted string and turns it into a list by line.strip().split()
-            # for each string that was split in this new list, turn those strings into ints
-            lines = [[int(value) for value in line.strip().split()] for line in file]
+        self._warnings = check_shape(self.row_count, self.column_count, self._text_file.name)
+        if not self._size:
+            for warning in self._warnings:
+                Log.warn(warning)
+
+    def _read_values(self):
+        'reads the values of a cached square that were skipped when it was created (see _needs_values), its warnings were already logged'
+        if self._lines is None:
+            warnings = self._warnings
+            self._read_file(log_warnings=False)
+            self._warnings = warnings
+
+    def _read_file(self, log_warnings: bool=True):
+        """
+        takes a file path to a magic square txt file and computes the rows and columns based on data read from file
+        input: Path to txt file, whether to log warnings about the shape of the square
 
-        self._lines = lines
+        a generated magic square is used as is instead of reading back the file it was just exported to
 
-        row_count = len(self._lines)
-        column_count = len(self._lines[0])
+        modifies: self._lines, self._parse_seconds, self._warnings
+        """
+        # load_grid raises instead of exiting so it can be used as a library (see algorithm.validate)
+        source = self._generated_magic_square if self._size else self._text_file
 
-        if row_count % 2 != 1 or column_count % 2 != 1:
-            Log.warn(f"'{self._text_file.name}' is not an odd sided square ({row_count}x{column_count})")
+        try:
+            start = perf_counter()
+            self._lines, warnings = load_grid(source, self._backend, self._text_file.name)
+            self._parse_seconds = perf_counter() - start
 
-        elif row_count != column_count:
-            Log.fatal(f"'{self._text_file.name}' contains a {row_count}x{column_count} shape which is not a square")
+        except Magic_Square_Error as error:
+            Log.fatal(str(error))
             print("exiting...")
             exit(1)
 
+        # generated squares of even size are magic by construction, warning that they aren't odd sided is just noise
+        if not self._size and log_warnings:
+            for warning in warnings:
+                Log.warn(warning)
+
+        self._warnings = warnings
+
     def _compute_sums(self):
         """
         compute the sum of each row, column, and diagonal of a 2d list
         input: list of list of ints where each list is a row
+
+        all sums come from a single pass over the grid (see algorithm.sums.compute_sums)
+        or straight from the cache if this square was already validated before (looked up in __init__)
         
-        modifies: self.is_magic_square, self._sums
+        modifies: self.is_magic_square, self._sums, self._row_sums, self._column_sums, self._diagonal_sums
         """
-        row_column_count = len(self._lines)
-        sums = {}
+        if self._cached_result is not None:
+            row_sums = self._cached_result.row_sums
+            column_sums = self._cached_result.column_sums
+            diagonal_sums = self._cached_result.diagonal_sums
+        elif self._jobs:
+            # parallel_sums falls back to compute_sums for a single job and for grids too small to be worth the worker processes
+            from algorithm.parallel import parallel_sums
+            row_sums, column_sums, diagonal_sums = parallel_sums(self._lines, self._jobs)
+        else:
+            row_sums, column_sums, diagonal_sums = compute_sums(self._lines)
 
-        for i, row in enumerate(self._lines):
-            row_sum = sum(row)
-            column_sum = sum([row[i] for row in self._lines])
-
-            self._is_magic_square = True
-            # check against prev row
-            if i > 1 and row_sum != sum(self._lines[i-1]):
-                self._is_magic_square = False
-            
-            # check against prev column
-            elif i > 1 and column_sum != sum([row[i-1] for row in self._lines]):
-                self._is_magic_square = False
-            
-            sums.update({f"row_{i+1}": row_sum})
-            sums.update({f"column_{i+1}": column_sum})
-
-            # only add 2 diagonals
-            if i == row_column_count - 1: # final iteration
-                # first diagonal: /
-                # row[i] because first row element must be the first, second row element must be the second, etc...
-                diagonal_1_sum = {f"diagonal_1": sum([row[len(row)-1-j] for j, row in enumerate(self._lines)])}
-                sums.update(diagonal_1_sum)
-
-                # second diagonal: \
-                # row[ (len(row)-1) - i ] because first row element must be the last, second row element must be the second from the last, etc...
-                diagonal_2_sum = {f"diagonal_2": sum([row[j] for j, row in enumerate(self._lines)])}
-                sums.update(diagonal_2_sum)
+        sums = {}
 
+        # keep the same key order as before: row_1, column_1, row_2, column_2, ..., diagonal_1, diagonal_2
+        for i in range(max(len(row_sums), len(column_sums))):
+            if i < len(row_sums):
+                sums.update({f"row_{i+1}": row_sums[i]})
+            if i < len(column_sums):
+                sums.update({f"column_{i+1}": column_sums[i]})
+
+        # first diagonal: /
+        sums.update({"diagonal_1": diagonal_sums[0]})
+        # second diagonal: \
+        sums.update({"diagonal_2": diagonal_sums[1]})
+
+        self._row_sums = row_sums
+        self._column_sums = column_sums
+        self._diagonal_sums = diagonal_sums
         self._sums = sums
 
+        # magic square only if every sum is the same one
+        self._is_magic_square = len(set(self.sums)) == 1
+
     def _define_text_color(self):
         """
         gives each value in the magic square a text color
@@ -178,231 +292,199 @@ class Magic_Square:
         red: the row's OR column's sum is not equal to the majority's sum
         blue: value is part of both a row AND a column whose sum is not equal to the majority's sum
 
-        modifies: self._text_color, self._majority_sum
+        only the indices of the rows, columns, and diagonals whose sum is not equal to the majority sum are kept (O(n)),
+        the color of a value is worked out from them when it is printed (see _cell_color and _row_colors)
+
+        modifies: self._bad_rows, self._bad_columns, self._bad_diagonals, self._majority_sum, self._majority_sum_count
         """
-        # counter returns a dictionary-like string representation of {value:int} where value is the value in my iterable and int is the number of times it occured
-        # need to turn the default Counter string representation to dict
-        sum_counter = Counter(self.sums).most_common()
-        majority_sum, majority_sum_count = sum_counter[0]
-
-        if len(set(self.sums)) == self.total_counts:
-            Log.fatal("Interesting! All your sums are unique values. You basically achieved an anti-magic square. Congrats I guess")
-            majority_sum = None
-        
-        elif not majority_sum_count > self.total_counts/2:
-            Log.fatal(f"No majority (>50%) sum found. The majority sum found is '{majority_sum}' which is only {(majority_sum_count/self.total_counts)*100}% ({majority_sum_count}) of the total count of sums present ({self.total_counts})")
+        with Log.stage("majority", sums=self.total_counts):
+            if self._cached_result is not None:
+                majority_sum, majority_sum_count = self._cached_result.majority_sum, self._cached_result.majority_sum_count
+            else:
+                majority_sum, majority_sum_count = find_majority_sum(self.sums)
+        log_majority_sum(majority_sum, majority_sum_count, self.total_counts)
+
+        with Log.stage("colors", lines=self.total_counts):
+            self._bad_rows = {i for i, row_sum in enumerate(self.row_sums) if row_sum != majority_sum}
+            self._bad_columns = {i for i, column_sum in enumerate(self.column_sums) if column_sum != majority_sum}
+            # 0: diagonal_1 '/', 1: diagonal_2 '\'
+            self._bad_diagonals = {i for i, diagonal_sum in enumerate(self.diagonal_sums) if diagonal_sum != majority_sum}
+        self._majority_sum = majority_sum
+        self._majority_sum_count = majority_sum_count
 
-        # create a list that's exactly the same size as the magic square being processed but with all values as '0'
-        lines_color = [[0]*self.column_count for _ in range(self.row_count)]
+    def _cell_color(self, row: int, column: int) -> str:
+        """
+        returns the text color of one value: counts how many of its row/column/diagonals have a sum that is not equal to the majority sum
+        input: row and column index (0 based)
 
-        # add +1 a row when the corresponding sum != majority sum
-        for i, row_sum in enumerate(self.row_sums):
-            lines_color[i] = [x+1 if row_sum != majority_sum else x for x in lines_color[i]]
-        
-        # add +1 a column when the corresponding sum != majority sum
-        for i, column_sum in enumerate(self.column_sums):
-            if column_sum != majority_sum:
-                for line in lines_color:
-                    line[i] += 1
-
-        # add +1 a diagonal when the corresponding sum != majority sum
-        diagonal_1_sum, diagonal_2_sum = self.diagonal_sums
-        if diagonal_1_sum != majority_sum:
-            for i, _ in enumerate(lines_color):
-                lines_color[i][(len(lines_color)-1)-i] += 1
-
-        if diagonal_2_sum != majority_sum:
-            for i, _ in enumerate(lines_color):
-                lines_color[i][i] += 1
-
-        """ replace values in lines_color with ANSI escape code (for text color)
-        if 0 (value isn't part of a row/column/diagonal whose sum != majority sum), default color
-        if 1 (value is part of ONE of either row/column/diagonal whose sum != majority sum), blue
-        if 2 (value is part of TWO of any combination of row/column/diagonal whose sum != majority sum), yellow
-        if 3 (value is part of THREE OR MORE of any combination of row/column/diagonal whose sum != majority sum), red
+        returns: ANSI escape code, see TEXT_COLORS
         """
-        blue = "\033[94m"
-        yellow = "\033[93m"
-        red = "\033[91m"
-        default_color = "\033[0m"
-
-        self._text_color = [
-            [
-                blue if val == 1
-                else yellow if val == 2
-                else red if val >= 3
-                else default_color
-                for val in line
-            ]
-            for line in lines_color
+        count = (
+            (row in self._bad_rows)
+            + (column in self._bad_columns)
+            # first diagonal: /
+            + (0 in self._bad_diagonals and column == (self.column_count-1) - row)
+            # second diagonal: \
+            + (1 in self._bad_diagonals and column == row)
+        )
+        return TEXT_COLORS[min(count, 3)]
+
+    def _row_colors(self, rows: list[int]):
+        """
+        yields the text color of every value of each row, one row at a time
+        input: row indices
+
+        only two full rows of colors are built (for rows whose sum is fine and rows whose sum isn't), every row is a copy of one of them
+        with at most its 2 diagonal values recolored, so no more than O(n) colors exist at once
+        """
+        bad_columns = [j in self._bad_columns for j in range(self.column_count)]
+        colors_by_row_violation = [
+            [TEXT_COLORS[bad_column] for bad_column in bad_columns],
+            [TEXT_COLORS[1 + bad_column] for bad_column in bad_columns],
         ]
-        self._majority_sum = majority_sum
+
+        for i in rows:
+            colors = colors_by_row_violation[i in self._bad_rows][:]
+            for j in ((self.column_count-1) - i, i):
+                if 0 <= j < self.column_count:
+                    colors[j] = self._cell_color(i, j)
+            yield colors
 
     def _generate_magic_square(self):
         """
         generates magic square from a given size
+        odd sizes use the closed form of the siamese staircase, even sizes the doubly/singly even methods (see algorithm.generator.magic_square_rows)
 
         modifies: self._generated_magic_square
         """
-        # create initial magic square
-        # if size==3, output should be [[0,0,0], [0,0,0], [0,0,0]]
-        lines = [[None for _ in range(self._size)] for _ in range(self._size)]
-
-        # put values into the initial magic square to make it a real magic square
-        values = [num for num in range(self._size*self._size)]
-        # starting position should be the middle column and first row
-        column = int(self._size / 2)
-        row = 0
-    
-        while values:
-            """
-            do staircase:
-                put value in position
-                put next value in top left from position
-                make sure the position wraps around (
-                    eg. box size 3, indices are from 0 to 2
-                        if position is 2,3 --convert-it-to--> 2,0
-                )
-                if there is already a value in the top left from position, go to bottom of position
-                keep going until all values are put
-            """
-            # wrap position around the box
-            while (row > self._size-1):
-                row -= self._size
-            while (row < 0):
-                row += self._size
-
-            while (column > self._size-1):
-                column -= self._size
-            while (column < 0):
-                column += self._size
-
-            # put value into position if there is no value there already
-            if lines[row][column] is None:
-                lines[row][column] = values.pop(0)
-            
-            # go to bottom of position and place the value there instead if original position is not empty
-            else:
-                row += 2
-                column -= 1
-
-                # wrap position around the box
-                while (row > self._size-1):
-                    row -= self._size
-                while (row < 0):
-                    row += self._size
-
-                while (column > self._size-1):
-                    column -= self._size
-                while (column < 0):
-                    column += self._size
-
-                lines[row][column] = values.pop(0)
-
-            column += 1    
-            row -=1
-        
-        self._generated_magic_square = lines
+        from algorithm.generator import magic_square_rows
+        self._generated_magic_square = list(magic_square_rows(self._size))
     
     def _export_magic_square(self):
         """
-        exports the generated magic square into a text file
+        exports the generated magic square into a text file (or .msq binary file with its sums in the header)
         the text file will be in:
         ./generated_magic_squares/magic_square_{datetime.now()}.txt
 
         modifies: self._text_file
         """
-        text_file_path = Path.cwd() / 'generated_magic_squares' / f'MAGIC_SQUARE_{datetime.now().strftime(r"%Y%m%d_%H%M%S%f")}.txt'
+        from datetime import datetime
+        from algorithm.binary import write_binary
+
+        suffix = BINARY_SUFFIX if self._export_format == "msq" else ".txt"
+        text_file_path = Path.cwd() / 'generated_magic_squares' / f'MAGIC_SQUARE_{datetime.now().strftime(r"%Y%m%d_%H%M%S%f")}{suffix}'
         Path.mkdir(text_file_path.parent, exist_ok=True)
 
-        with open (text_file_path, 'w') as file:
-            for row in self._generated_magic_square:
-                for value in row:
-                    file.write(f"{value} ")
-                file.write("\n")
+        if suffix == BINARY_SUFFIX:
+            write_binary(self._generated_magic_square, text_file_path, compute_sums(self._generated_magic_square))
+
+        else:
+            with open (text_file_path, 'w') as file:
+                # one write per row instead of one per value; same "value value ... \n" format
+                for row in self._generated_magic_square:
+                    file.write(" ".join(map(str, row)) + " \n")
         
         self._text_file = text_file_path
 
-    def print_magic_square(self):
+    def print_magic_square(self, stream: TextIOBase|None=None, viewport: int|None=None):
         """
         prints the magic square with borders
         sums are printed outside the borders
+
+        the whole frame is built in one buffer and written with a single write instead of a print per value/border
+        input: text stream to write to (default: stdout);
+        viewport size: if the square is bigger than viewport x viewport, only the rows and columns whose sum != majority sum are printed (at most viewport of each)
         """
-        # ANSI text color codes
-        blue = "\033[94m"
-        default_color = "\033[0m" # default value (acting as reset)
-        text_color = default_color
-        padding = 10
+        self._read_values()
+        rows = range(self.row_count)
+        columns = range(self.column_count)
+        buffer = StringIO()
 
         if self.is_magic_square:
-            Log.info("valid magic square! all sums are equal\n")
+            Log.info("valid magic square! all sums are equal\n", file=buffer)
         else:
-            Log.fatal(f"invalid magic square!", end=" ")
+            Log.fatal(f"invalid magic square!", end=" ", file=buffer)
             if self._majority_sum:
-                print(f"some sums are not equal to '{self._majority_sum}'\n")
+                buffer.write(f"some sums are not equal to '{self._majority_sum}'\n\n")
             else:
-                print(r"all values are unique lol", end="\n\n")
+                buffer.write("all values are unique lol\n\n")
+
+        if viewport is not None and (self.row_count > viewport or self.column_count > viewport):
+            rows = self._viewport_indices(self.row_sums, viewport)
+            columns = self._viewport_indices(self.column_sums, viewport)
+            Log.info(
+                f"showing {len(rows)} of {self.row_count} rows and {len(columns)} of {self.column_count} columns "
+                f"(rows/columns whose sum is not equal to the majority sum first)\n",
+                file=buffer,
+            )
+
+        with Log.stage("print", cells=len(rows)*len(columns)) as stage:
+            self._render(buffer, rows, columns)
+
+            frame = buffer.getvalue()
+            stream = stream or sys.stdout
+            stream.write(frame)
+            stream.flush()
+            stage.add(bytes_written=len(frame))
+
+    def _viewport_indices(self, line_sums: list[int], viewport: int) -> list[int]:
+        """
+        picks which rows (or columns) to show in viewport mode
+        input: row (or column) sums, viewport size
 
-        # print column sums first (on top of border)
-        for i in range(len(self._lines[0])):
-            if self.column_sums[i] != self._majority_sum:
-                text_color = blue
+        returns: indices of the lines whose sum != majority sum, or of the first lines if every sum is fine; at most viewport of them
+        """
+        indices = [i for i, line_sum in enumerate(line_sums) if line_sum != self._majority_sum][:viewport]
+        return indices or list(range(min(viewport, len(line_sums))))
+
+    def _render(self, buffer: StringIO, rows: list[int], columns: list[int]):
+        """
+        writes the bordered square into the buffer; only the given rows and columns are written
+        input: buffer, row indices, column indices
+        """
+        # ANSI text color codes
+        blue = "\033[94m"
+        default_color = "\033[0m" # default value (acting as reset)
+        padding = 10
+
+        def label_color(line_sum: int) -> str:
+            return blue if line_sum != self._majority_sum else default_color
 
+        # column sums first (on top of border)
+        for i in columns:
             column_label = f"c{i+1}: {self._sums[f'column_{i+1}']}"
-            print(f"{text_color}{column_label:^{padding+1}}{default_color}", end="")
-            text_color = default_color
+            buffer.write(f"{label_color(self.column_sums[i])}{column_label:^{padding+1}}{default_color}")
 
         # diagonal_1: /
-        if self.diagonal_sums[0] != self._majority_sum:
-            text_color = blue
-
         diagonal_1_label = f"d1: {self._sums['diagonal_1']}"
-        print(f"{text_color}{diagonal_1_label:>{padding}}{default_color}")
-        text_color = default_color
-
-        # print top border
-        for _ in range(len(self._lines[0])):
-            print(" ", end="")
-            print(f"{'_'*padding}", end="")
-        print()
-        
-        # print inner borders with values
-        for i, (line, colors) in enumerate(zip(self._lines, self._text_color)):
-            # inner border
-            print(f"{'|'}", end="")
-            for _ in line:
-                print(f"{' ':^{padding}}", end="")
-                print(f"{'|'}", end="")
-            print()
+        buffer.write(f"{label_color(self.diagonal_sums[0])}{diagonal_1_label:>{padding}}{default_color}\n")
+
+        # top border
+        buffer.write(f" {'_'*padding}" * len(columns) + "\n")
+
+        # borders are the same for every row so they are only built once
+        inner_border = "|" + f"{' ':^{padding}}|" * len(columns) + "\n"
+        low_border = f"|{'_'*padding}" * len(columns) + "|\n"
+
+        # inner borders with values
+        for i, colors in zip(rows, self._row_colors(rows)):
+            line = self._lines[i]
+
+            buffer.write(inner_border)
 
             # values
-            print(f"{'|'}", end="")
-            for value, color in zip(line, colors):
-                print(f"{color}{value:^{padding}}{default_color}", end="|")
+            buffer.write("|")
+            buffer.write("".join([f"{colors[j]}{line[j]:^{padding}}{default_color}|" for j in columns]))
 
             # row sums
-            if self.row_sums[i] != self._majority_sum:
-                text_color = blue
-
             row_label = f"r{i+1}: {self._sums[f'row_{i+1}']}"
-            print(f"{text_color}{row_label:>{padding+1}}{default_color}", end="")
-            text_color = default_color
-            print()
+            buffer.write(f"{label_color(self.row_sums[i])}{row_label:>{padding+1}}{default_color}\n")
 
-            # low border
-            for _ in line:
-                print(f"|{'_'*padding}", end="")
-            print("|")
-        print()
+            buffer.write(low_border)
+        buffer.write("\n")
 
         # diagonal_2: \
-        # empty space
-        for _ in range(len(self._lines[0])):
-            print(f"{'':^{padding+1}}", end="")
-
-        # the actual diagonal label with sum
-        if self.diagonal_sums[1] != self._majority_sum:
-            text_color = blue
+        # empty space, then the actual diagonal label with sum
         diagonal_2_label = f"d2: {self._sums['diagonal_2']}"
-        print(f"{text_color}{diagonal_2_label:>{padding}}{default_color}")
-        text_color = default_color
\ No newline at end of file
+        buffer.write(f"{'':^{padding+1}}" * len(columns))
+        buffer.write(f"{label_color(self.diagonal_sums[1])}{diagonal_2_label:>{padding}}{default_color}\n")
@@ -0,0 +1,116 @@
+"""
+multi-core sums for very large squares
+
+the grid is split into bands of rows and every band is summed in a worker process; the grid itself is never pickled:
+    - a memory-mapped .msq file is opened again by every worker (the operating system shares the pages)
+    - where workers are forked (linux) they inherit the grid of the parent process as is, copy-on-write memory is shared memory for free
+    - anywhere else the grid is copied once into a shared memory block that every worker attaches to
+each worker returns the full row sums of its band plus partial column and diagonal sums, which are added together at the end
+"""
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_start_method, shared_memory
+from os import cpu_count
+
+from algorithm.backend import is_array, np
+from algorithm.sums import compute_sums, sum_accumulator
+
+# below this many values starting the worker processes takes longer than summing in one process
+PARALLEL_MIN_CELLS = 4_000_000
+# more bands than workers so a slow worker doesn't hold up the others
+_BANDS_PER_WORKER = 4
+
+# the grid of the current worker process, set once by _attach (or by parallel_sums right before the workers are forked)
+_worker_grid = None
+_worker_memory = None
+
+def parallel_sums(grid, workers: int|None=None) -> tuple[list[int], list[int], list[int]]:
+    """
+    computes the sum of every row, column, and both diagonals across worker processes
+    input: 2d NumPy array (list of lists and small grids are summed in this process, see algorithm.sums.compute_sums),
+    number of worker processes (default: number of cpus)
+
+    gives exactly the same sums as compute_sums: every band is summed in the accumulator compute_sums would pick for the
+    whole grid (see algorithm.sums.sum_accumulator), which no partial or total sum can overflow
+    returns: (row_sums, column_sums, diagonal_sums)
+    """
+    global _worker_grid
+
+    workers = workers or cpu_count() or 1
+    if not is_array(grid) or workers == 1 or grid.size < PARALLEL_MIN_CELLS:
+        return compute_sums(grid)
+
+    # sums that could overflow int64 are added up as python ints in this process
+    accumulator = sum_accumulator(grid)
+    if accumulator is None:
+        return compute_sums(grid)
+
+    row_count, column_count = grid.shape
+    band_count = min(row_count, workers * _BANDS_PER_WORKER)
+    bounds = [row_count * band // band_count for band in range(band_count + 1)]
+
+    memory = None
+    if isinstance(grid, np.memmap) and grid.filename is not None and grid.flags.c_contiguous:
+        # the file is already shared between processes through the page cache
+        source = ("file", grid.filename, grid.offset, grid.dtype.str, grid.shape)
+    elif get_start_method() == "fork":
+        # forked workers start with a copy-on-write view of this process, which they only read
+        _worker_grid = grid
+        source = ("inherited", None, 0, grid.dtype.str, grid.shape)
+    else:
+        memory = shared_memory.SharedMemory(create=True, size=max(1, grid.nbytes))
+        np.ndarray(grid.shape, dtype=grid.dtype, buffer=memory.buf)[...] = grid
+        source = ("shared", memory.name, 0, grid.dtype.str, grid.shape)
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach, initargs=source) as pool:
+            bands = list(pool.map(_band_sums, bounds[:-1], bounds[1:], [accumulator]*band_count))
+    finally:
+        _worker_grid = None
+        if memory is not None:
+            memory.close()
+            memory.unlink()
+
+    # a partial sum is never bigger than the whole line it is part of, so adding them up can't overflow the accumulator either
+    row_sums = np.concatenate([band[0] for band in bands]).tolist()
+    column_sums = np.sum([band[1] for band in bands], axis=0, dtype=accumulator).tolist()
+    diagonal_1_sum = int(np.sum([band[2] for band in bands], dtype=accumulator))
+    diagonal_2_sum = int(np.sum([band[3] for band in bands], dtype=accumulator))
+
+    return row_sums, column_sums, [diagonal_1_sum, diagonal_2_sum]
+
+def _attach(kind: str, name: str, offset: int, dtype: str, shape: tuple[int, int]):
+    """
+    runs once in every worker process: opens the grid without copying it
+    input: "file" (name is the path of a memory-mapped file), "shared" (name is a shared memory block),
+    or "inherited" (the grid was set before the worker was forked); byte offset, dtype, shape
+
+    modifies: _worker_grid, _worker_memory
+    """
+    global _worker_grid, _worker_memory
+
+    if kind == "inherited":
+        return
+
+    if kind == "file":
+        _worker_grid = np.memmap(name, dtype=dtype, mode="r", offset=offset, shape=shape)
+    else:
+        # keep a reference to the block, the array is only a view on it
+        _worker_memory = shared_memory.SharedMemory(name=name)
+        _worker_grid = np.ndarray(shape, dtype=dtype, buffer=_worker_memory.buf)
+
+def _band_sums(start: int, end: int, accumulator: str):
+    """
+    sums one band of rows of the worker's grid
+    input: first row (inclusive) and last row (exclusive) of the band, dtype to sum in (see algorithm.sums.sum_accumulator)
+
+    returns: (row sums, partial column sums, partial diagonal_1 '/' sum, partial diagonal_2 '\\' sum)
+    """
+    band = _worker_grid[start:end]
+    column_count = band.shape[1]
+
+    # the diagonals only go through the first min(row_count, column_count) rows, the same as ndarray.diagonal()
+    rows = np.arange(start, min(end, column_count))
+    diagonal_1_sum = band[rows - start, column_count - 1 - rows].sum(dtype=accumulator)
+    diagonal_2_sum = band[rows - start, rows].sum(dtype=accumulator)
+
+    return band.sum(axis=1, dtype=accumulator), band.sum(axis=0, dtype=accumulator), diagonal_1_sum, diagonal_2_sum
@@ -0,0 +1,99 @@
+import mmap
+import warnings
+from pathlib import Path
+from sys import argv
+from time import perf_counter
+
+from algorithm.backend import DEFAULT_BACKEND, NUMPY_AVAILABLE, np
+from algorithm.binary import is_binary, read_binary
+
+def read_square(text_file: Path, backend: str=DEFAULT_BACKEND):
+    """
+    reads a magic square text file (or .msq binary file, see algorithm.binary) into a grid
+    input: Path to txt/msq file, backend name ("numpy" or "python")
+
+    with the numpy backend all integers are tokenized in bulk by NumPy's C parser straight into a 2d int64 array,
+    so no python string is created per value
+    anything the fast path can't read exactly like the plain python path (ragged or blank rows, non-ascii digits,
+    values that don't fit in int64, ...) is read again with the plain python path so the result is always the same
+
+    returns: 2d NumPy array (numpy backend) or list of list of ints where each list is a row
+    """
+    if is_binary(text_file):
+        return read_binary(text_file, backend)
+
+    if backend == "numpy" and NUMPY_AVAILABLE:
+        grid = _read_square_numpy(text_file)
+        if grid is not None:
+            return grid
+
+    with open(text_file, "r") as file:
+        # map(int, ...) converts every value of the split line in C instead of a python comprehension
+        return [list(map(int, line.split())) for line in file]
+
+def _read_square_numpy(text_file: Path):
+    """
+    fast path of read_square
+    input: Path to txt file
+
+    returns: 2d NumPy array, or None if the file has to be read with the plain python path instead
+    """
+    line_count = _count_lines(text_file)
+    if not line_count:
+        return None
+
+    try:
+        with warnings.catch_warnings():
+            # whitespace only files are left to the plain python path, no need to warn about them
+            warnings.simplefilter("ignore", UserWarning)
+            # comments=None so '#' is a bad value like it is for int()
+            grid = np.loadtxt(text_file, dtype=np.int64, comments=None, ndmin=2)
+    except ValueError:
+        # ragged rows, values int64 can't hold, or something only python's int() understands (eg. '1_000')
+        return None
+
+    # loadtxt skips blank lines, the plain python path keeps them as empty rows
+    if grid.shape[0] != line_count:
+        return None
+
+    return grid
+
+def _count_lines(text_file: Path) -> int:
+    """
+    counts the lines of the file the same way iterating over it does, by memory-mapping it and counting its newlines at once
+    input: Path to txt file
+
+    returns: number of lines (0 if the file is empty)
+    """
+    with open(text_file, "rb") as file:
+        try:
+            memory_map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty files can't be memory-mapped
+            return 0
+
+        with memory_map:
+            # a last line without a trailing newline is still a line
+            return _count_newlines(memory_map) + (memory_map[-1:] != b"\n")
+
+def _count_newlines(memory_map: mmap.mmap) -> int:
+    'returns how many newline bytes are in the memory-mapped file'
+    # the NumPy view on the map has to be gone before the map is closed, so it only lives inside this function
+    return int(np.count_nonzero(np.frombuffer(memory_map, dtype=np.uint8) == ord("\n")))
+
+def throughput(byte_count: int, seconds: float) -> float:
+    'returns parse throughput in MB/s'
+    return (byte_count / 1_000_000) / seconds if seconds > 0 else float("inf")
+
+if __name__ == "__main__":
+    # python -m algorithm.parser path/to/text/file [numpy|python]
+    from utils.message import Log
+
+    text_file = Path(argv[1]).resolve()
+    backend = argv[2] if len(argv) > 2 else DEFAULT_BACKEND
+
+    start = perf_counter()
+    grid = read_square(text_file, backend)
+    seconds = perf_counter() - start
+
+    Log.info(f"parsed {len(grid)}x{len(grid[0])} from '{text_file.name}' ({backend}) at {throughput(text_file.stat().st_size, seconds):.2f} MB/s")
@@ -0,0 +1,39 @@
+from dataclasses import asdict, dataclass
+
+@dataclass(frozen=True)
+class Validation_Result:
+    """
+    result of validating a magic square with validate()
+
+    implied order of diagonal_sums: diagonal_1 '/', and diagonal_2 '\\'
+    majority_sum is None if all sums are unique values
+    """
+    is_magic_square: bool
+    row_sums: list[int]
+    column_sums: list[int]
+    diagonal_sums: list[int]
+    majority_sum: int|None
+    majority_sum_count: int
+    warnings: list[str]
+
+    @property
+    def sums(self) -> list[int]:
+        """
+        returns all the sums for each row, column, and diagonal in a list
+        implied order: row_1, row_2, ..., row_n, column_1, column_2, ..., column_n, diagonal_1, and diagonal_2
+        """
+        return self.row_sums + self.column_sums + self.diagonal_sums
+
+    @property
+    def total_counts(self) -> int:
+        'returns the total count of rows, columns, and main 2 diagonals'
+        return len(self.row_sums) + len(self.column_sums) + 2
+
+    @property
+    def has_majority(self) -> bool:
+        'returns true if more than half of all sums are the majority sum'
+        return self.majority_sum is not None and self.majority_sum_count > self.total_counts/2
+
+    def to_dict(self) -> dict:
+        'returns the result as a dictionary that can be dumped as json'
+        return asdict(self)
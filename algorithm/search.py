@@ -0,0 +1,436 @@
+"""
+many distinct magic squares of one size, for testing whatever reads them
+
+orders 3 and 4 are small enough to enumerate every magic square (values 0 to size*size - 1, like algorithm.generator):
+8 of order 3 and 7040 of order 4, which are 1 and 880 squares up to rotation and reflection
+bigger orders are sampled at random instead: a square from algorithm.generator is shuffled with transformations
+that keep every row, column, and diagonal sum (see sample_magic_squares)
+
+python -m algorithm.search size [--count number] [--seed number] [--unique] [--out path/to/directory]
+"""
+import random
+from hashlib import blake2b
+from itertools import combinations
+from math import gcd
+from operator import itemgetter
+from pathlib import Path
+from sys import argv
+from time import perf_counter
+
+from algorithm.canonical import SYMMETRIES, apply_symmetry, canonical_hash
+from algorithm.generator import magic_square_rows
+from algorithm.sums import is_magic
+from utils.message import Log
+
+# orders small enough that every magic square can be found
+ENUMERABLE_SIZES = [3, 4]
+# sample_magic_squares stops once this many draws in a row were all squares it had already given
+MAX_REPEATED_DRAWS = 1000
+
+# every square of an enumerable order, for the quadrants of singly even squares (see _small_squares)
+_small_square_cache: dict[int, list[list[list[int]]]] = {}
+
+def enumerate_magic_squares(size: int, unique: bool=False):
+    """
+    yields every magic square of an enumerable order (3 or 4) with the values 0 to size*size - 1
+    input: size, whether to only yield one square of every 8 rotations/reflections (the canonical form, see algorithm.canonical)
+
+    the search fills one cell at a time and keeps the values used so far, and the values on each line, as bitmasks:
+    the values a cell can take are the values not used yet that can still complete every line through it (see _completions),
+    one AND per line, so the last empty cell of a line only ever gets the one value that completes it
+    only squares whose smallest corner is the top left one and whose [0][1] is smaller than [1][0] are searched (the canonical forms),
+    so 7 of every 8 rotations/reflections are pruned instead of being found; without unique they are made from the canonical form
+    returns: generator of squares (list of rows, top to bottom) in the order they are found
+    raises: ValueError if the order can't be enumerated
+    """
+    if size not in ENUMERABLE_SIZES:
+        raise ValueError(f"only orders {' and '.join(map(str, ENUMERABLE_SIZES))} can be enumerated, sample bigger ones with sample_magic_squares")
+
+    if unique:
+        yield from _search(size)
+        return
+
+    for square in _search(size):
+        # every canonical square has 8 different rotations/reflections since all of its values are different
+        for symmetry in SYMMETRIES:
+            yield apply_symmetry(square, symmetry)
+
+def _search(size: int):
+    'backtracking search behind enumerate_magic_squares (see there); yields the canonical form of each square as a list of rows'
+    cell_count = size*size
+    lines = _lines(size)
+    completions = _completions(size)
+    steps = _plan(size, lines)
+
+    values = [0]*cell_count
+    # bitmask of the values placed on each line so far
+    line_masks = [0]*len(lines)
+
+    def fill(step: int, used: int):
+        if step == len(steps):
+            yield [values[row*size:(row + 1)*size] for row in range(size)]
+            return
+
+        cell, cell_lines, smaller_cells, larger_cells = steps[step]
+
+        # a value can only go in the cell if it can still complete every line through it, and is not used anywhere else
+        candidates = ~used
+        for line in cell_lines:
+            candidates &= completions.get(line_masks[line], 0)
+        # symmetry pruning: only values bigger than the cells that must be smaller, and smaller than the cells that must be bigger
+        for other in smaller_cells:
+            candidates &= ~((2 << values[other]) - 1)
+        for other in larger_cells:
+            candidates &= (1 << values[other]) - 1
+
+        while candidates:
+            lowest = candidates & -candidates
+            candidates ^= lowest
+            value = lowest.bit_length() - 1
+
+            values[cell] = value
+            for line in cell_lines:
+                line_masks[line] |= lowest
+
+            yield from fill(step + 1, used | lowest)
+
+            for line in cell_lines:
+                line_masks[line] ^= lowest
+
+    yield from fill(0, 0)
+
+def _lines(size: int) -> list[list[int]]:
+    'returns the cells of every row, column, and both diagonals; cells are indexes into the flat row by row grid'
+    return (
+        [[row*size + column for column in range(size)] for row in range(size)]
+        + [[row*size + column for row in range(size)] for column in range(size)]
+        + [[i*size + i for i in range(size)], [i*size + size - 1 - i for i in range(size)]]
+    )
+
+def _completions(size: int) -> dict[int, int]:
+    """
+    finds which values can still be added to a partly filled line
+    input: size
+
+    every line of a magic square holds a set of size different values that add up to the magic sum;
+    all of those sets are found once, then every subset of them is mapped to the values that complete it to one of them
+    returns: {bitmask of values on a line: bitmask of every value that is in some full line with those values} (a subset missing from it can't be completed)
+    """
+    magic_sum = size*(size*size - 1)//2
+    completions = {}
+
+    for full_line in combinations(range(size*size), size):
+        if sum(full_line) != magic_sum:
+            continue
+
+        full_mask = sum(1 << value for value in full_line)
+        for count in range(size + 1):
+            for part in combinations(full_line, count):
+                part_mask = sum(1 << value for value in part)
+                completions[part_mask] = completions.get(part_mask, 0) | (full_mask & ~part_mask)
+
+    return completions
+
+def _plan(size: int, lines: list[list[int]]) -> list[tuple]:
+    """
+    decides the order the search fills the cells in
+    input: size, cells of every line (see _lines)
+
+    a cell that is the last empty cell of a line comes first, since it has only one value it can be;
+    otherwise the cell that leaves the most lines with one empty cell (so the first row and diagonals get filled early)
+    returns: for every cell in filling order: (cell, indexes of the lines through it, cells that must be smaller than it, cells that must be larger than it)
+    """
+    # (smaller cell, larger cell) pairs that only the canonical form of a square satisfies
+    # the top left corner is the smallest corner, and the value right of it is smaller than the value below it
+    order_pairs = [(0, size - 1), (0, (size - 1)*size), (0, size*size - 1), (1, size)]
+
+    filled = set()
+    steps = []
+
+    def forced_lines_after(cell: int) -> tuple[int, int]:
+        'how many lines would have one empty cell left once cell is filled, then how many lines go through it'
+        now_filled = filled | {cell}
+        return sum(len(set(line) - now_filled) == 1 for line in lines), sum(cell in line for line in lines)
+
+    while len(filled) < size*size:
+        forcing = next((line for line in lines if len(set(line) - filled) == 1), None)
+        if forcing:
+            cell = (set(forcing) - filled).pop()
+        else:
+            # the first one on ties
+            cell = max((cell for cell in range(size*size) if cell not in filled), key=forced_lines_after)
+        filled.add(cell)
+
+        cell_lines = [i for i, line in enumerate(lines) if cell in line]
+        smaller_cells = [smaller for smaller, larger in order_pairs if larger == cell and smaller in filled]
+        larger_cells = [larger for smaller, larger in order_pairs if smaller == cell and larger in filled]
+
+        steps.append((cell, cell_lines, smaller_cells, larger_cells))
+
+    return steps
+
+def sample_magic_squares(size: int, count: int|None=None, seed: int|None=None, distinct: bool=True, unique: bool=False):
+    """
+    yields random magic squares of any size from 3 up with the values 0 to size*size - 1
+    input: size, how many squares (None for no end), seed of the random generator (None for a different run every time),
+    whether to never yield the same square twice, whether to never yield a rotation or reflection of a square already given either
+
+    orders 3 and 4 are drawn from every square enumerate_magic_squares finds (without repeats: in a random order, so every one comes out once)
+    bigger orders start from a random base square (odd: two random linear digit squares, see _random_base; singly even: strachey with
+    a random quadrant square and random swaps, see _random_singly_even; doubly even: the complement pattern) and apply, at random:
+        - a permutation of the "digits" of the values in base size (value = size*high + low), the same one for every value (see _permute_digits)
+        - the same symmetric permutation to the rows and the columns: rows/columns i and size-1-i stay mirrored,
+          which keeps every row and column (just reordered) and both diagonals (their values just move along them)
+        - the complement of every value (size*size - 1 - value), which keeps every sum equal
+        - one of the 8 rotations/reflections
+    with distinct, only a hash of every square given is kept (with unique, the hash of its canonical form, see algorithm.canonical);
+    the generator ends early once MAX_REPEATED_DRAWS draws in a row were all repeats, and logs a warning if it gave fewer than count
+    returns: generator of squares (list of rows, top to bottom)
+    raises: ValueError if size is less than 3
+    """
+    if size < 3:
+        raise ValueError(f"magic squares are at least 3x3, not {size}x{size}")
+
+    generator = random.Random(seed)
+
+    if size in ENUMERABLE_SIZES:
+        pool = list(enumerate_magic_squares(size, unique))
+        if not (distinct or unique):
+            while count is None or count > 0:
+                yield generator.choice(pool)
+                count = None if count is None else count - 1
+            return
+
+        generator.shuffle(pool)
+        yield from pool[:count]
+        _warn_if_short(size, count, len(pool))
+        return
+
+    doubly_even_base = list(magic_square_rows(size)) if size % 4 == 0 else None
+
+    seen = set()
+    repeats = 0
+    given = 0
+
+    while count is None or given < count:
+        if size % 2:
+            square = _random_base(size, generator)
+        elif doubly_even_base is None:
+            square = _random_singly_even(size, generator)
+        else:
+            square = doubly_even_base
+        square = _shuffle(_permute_digits(square, generator), generator)
+
+        if distinct or unique:
+            digest = canonical_hash(square) if unique else blake2b(repr(square).encode(), digest_size=16).digest()
+            if digest in seen:
+                repeats += 1
+                if repeats >= MAX_REPEATED_DRAWS:
+                    _warn_if_short(size, count, given)
+                    return
+                continue
+            seen.add(digest)
+            repeats = 0
+
+        given += 1
+        yield square
+
+def _warn_if_short(size: int, count: int|None, given: int):
+    'logs a warning if a sample ran out of different squares before giving count of them'
+    if count is not None and given < count:
+        Log.warn(f"only {given} different magic squares of order {size} could be found, not {count}")
+
+def _random_base(size: int, generator: random.Random) -> list[list[int]]:
+    """
+    draws a random odd sized magic square made of two linear "digit" squares (the siamese square is one of them)
+    input: odd size, random generator
+
+    value[i][j] = size*((a*i + b*j + c) % size) + ((d*i + e*j + f) % size); every row and column holds each digit once if
+    a, b, d, and e are coprime with size, and the values are all different if a*e - b*d is too
+    a diagonal whose coefficient k (a + b or a - b, the same for d and e) shares g = gcd(k, size) with size holds g times
+    the digits of one residue class mod g, which only add up to the magic sum if that class is (g - 1)/2, so the offsets c and f are picked to match
+    returns: list of rows
+    """
+    units = [k for k in range(1, size) if gcd(k, size) == 1]
+
+    def digit_square_coefficients():
+        while True:
+            a, b = generator.choice(units), generator.choice(units)
+            # \ diagonal: (a + b)*i + c, / diagonal (j = size - 1 - i): (a - b)*i + b*(size - 1) + c
+            offsets = [
+                c for c in range(size)
+                if _balanced(a + b, c, size) and _balanced(a - b, b*(size - 1) + c, size)
+            ]
+            if offsets:
+                return a, b, generator.choice(offsets)
+
+    while True:
+        a, b, c = digit_square_coefficients()
+        d, e, f = digit_square_coefficients()
+        if gcd(a*e - b*d, size) == 1:
+            break
+
+    return [[size*((a*i + b*j + c) % size) + (d*i + e*j + f) % size for j in range(size)] for i in range(size)]
+
+def _random_singly_even(size: int, generator: random.Random) -> list[list[int]]:
+    """
+    draws a random singly even sized (size % 4 == 2) magic square with a generalized strachey method (see algorithm.generator.singly_even_rows)
+    input: singly even size, random generator
+
+    the quadrants can be any magic square of half the size (not just the siamese one): swaps only ever exchange a value
+    with the same value of the other copy, so they only change the quarter offsets
+    every top row swaps k of its left columns and k - 1 of its right columns with the bottom row under it, which changes every row
+    by the same amount and no column at all; any columns can be picked as long as every diagonal gets as many swapped values
+    on each side as the usual pattern (k + 1 on the left, k - 1 on the right), so the swaps on the diagonals are drawn first
+    (see _diagonal_swaps) and the rest of the columns are picked freely
+    returns: list of rows
+    """
+    half = size // 2
+    quarter = half*half
+    k = (size - 2) // 4
+
+    if half in ENUMERABLE_SIZES:
+        small = generator.choice(_small_squares(half))
+    else:
+        small = _shuffle(_permute_digits(_random_base(half, generator), generator), generator)
+    square = [row + [value + 2*quarter for value in row] for row in small]
+    square += [[value + 3*quarter for value in row] + [value + quarter for value in row] for row in small]
+
+    # rows that swap their column on the \\ and / diagonal, on the left (k + 1 of each) and on the right (k - 1 of each)
+    main_left, anti_left = _diagonal_swaps(half, k + 1, k, generator)
+    main_right, anti_right = _diagonal_swaps(half, k - 1, k - 1, generator)
+    swaps = [
+        (
+            _pick_columns(range(half), (row, half - 1 - row), (row in main_left, row in anti_left), k, generator),
+            _pick_columns(range(half, size), (half + row, size - 1 - row), (row in main_right, row in anti_right), k - 1, generator),
+        )
+        for row in range(half)
+    ]
+
+    for row, (left, right) in enumerate(swaps):
+        for column in [*left, *right]:
+            square[row][column], square[row + half][column] = square[row + half][column], square[row][column]
+
+    return square
+
+def _diagonal_swaps(half: int, count: int, limit: int, generator: random.Random) -> tuple[set[int], set[int]]:
+    """
+    draws which top rows of a singly even square swap their column on each diagonal, on one side (see _random_singly_even)
+    input: half the size, how many rows swap on each diagonal, how many columns a row swaps on that side, random generator
+
+    the middle row has the same column on both diagonals, so it is either in both sets or in neither
+    returns: (rows that swap on the \\ diagonal, rows that swap on the / diagonal)
+    """
+    middle = half // 2
+    others = [row for row in range(half) if row != middle]
+
+    while True:
+        in_middle = generator.random() < 0.5 and limit > 0
+        main = {*generator.sample(others, count - in_middle)}
+        anti = {*generator.sample(others, count - in_middle)}
+        # a row with only one column to swap can't swap both of its diagonal columns
+        if limit > 1 or not main & anti:
+            return (main | {middle}, anti | {middle}) if in_middle else (main, anti)
+
+def _pick_columns(columns: range, diagonal_columns: tuple[int, int], swapped: tuple[bool, bool], count: int, generator: random.Random) -> list[int]:
+    'returns count of the columns: the diagonal columns that are swapped, and the rest drawn from the columns on no diagonal'
+    picked = [*{column for column, swap in zip(diagonal_columns, swapped) if swap}]
+    free = [column for column in columns if column not in diagonal_columns]
+    return picked + generator.sample(free, count - len(picked))
+
+def _small_squares(size: int) -> list[list[list[int]]]:
+    'returns every magic square of an enumerable order (see enumerate_magic_squares), found once per process'
+    if size not in _small_square_cache:
+        _small_square_cache[size] = list(enumerate_magic_squares(size))
+    return _small_square_cache[size]
+
+def _balanced(k: int, offset: int, size: int) -> bool:
+    'returns true if (k*i + offset) % size for i in 0 to size - 1 adds up to size*(size - 1)/2, the sum of every digit once'
+    g = gcd(k, size)
+    return offset % g == (g - 1) // 2
+
+def _permute_digits(square: list[list[int]], generator: random.Random) -> list[list[int]]:
+    """
+    maps every value size*high + low to size*high_permutation[high] + low_permutation[low]
+    input: magic square, random generator
+
+    both permutations swap the digits k and size-1-k together (see _symmetric_permutation), so every line whose digits
+    come in such pairs, or hold every digit once, keeps its sum; not every square has only such lines, so the result is checked
+    returns: the permuted square if it is still magic, otherwise the square as it was
+    """
+    size = len(square)
+    high_permutation = _symmetric_permutation(size, generator)
+    low_permutation = _symmetric_permutation(size, generator)
+
+    permuted = [[size*high_permutation[value // size] + low_permutation[value % size] for value in row] for row in square]
+    return permuted if is_magic(permuted) else square
+
+def _symmetric_permutation(size: int, generator: random.Random) -> list[int]:
+    'returns a random permutation of 0 to size - 1 that keeps i and size-1-i mirrored (shuffles the pairs, then flips some); the middle one stays'
+    half = size // 2
+
+    pairs = list(range(half))
+    generator.shuffle(pairs)
+    permutation = [0]*size
+    for i, pair in enumerate(pairs):
+        low, high = (pair, size - 1 - pair) if generator.random() < 0.5 else (size - 1 - pair, pair)
+        permutation[i], permutation[size - 1 - i] = low, high
+    if size % 2:
+        permutation[half] = half
+
+    return permutation
+
+def _shuffle(base: list[list[int]], generator: random.Random) -> list[list[int]]:
+    'applies a random symmetric permutation, maybe the complement, and a random rotation/reflection to a magic square'
+    size = len(base)
+
+    # rows and columns get the same permutation
+    permutation = _symmetric_permutation(size, generator)
+    pick = itemgetter(*permutation)
+    square = [list(pick(base[row])) for row in permutation]
+
+    if generator.random() < 0.5:
+        last = size*size - 1
+        square = [[last - value for value in row] for row in square]
+
+    return apply_symmetry(square, generator.choice(SYMMETRIES))
+
+if __name__ == "__main__":
+    from algorithm.validate import is_magic_square
+
+    options = {"count": None, "seed": None, "unique": False, "out": None}
+    argv_iter = iter(argv[2:])
+    for arg in argv_iter:
+        if arg == "--unique":
+            options["unique"] = True
+        elif arg in ["--count", "--seed"]:
+            options[arg[2:]] = int(next(argv_iter))
+        elif arg == "--out":
+            options["out"] = Path(next(argv_iter)).resolve()
+        else:
+            Log.fatal(f"'{arg}' is not a valid argument")
+            exit(1)
+
+    size = int(argv[1])
+    if options["count"] is None and size in ENUMERABLE_SIZES:
+        squares = enumerate_magic_squares(size, options["unique"])
+    else:
+        squares = sample_magic_squares(size, options["count"] or 1, options["seed"], unique=options["unique"])
+
+    if options["out"] is not None:
+        Path.mkdir(options["out"], parents=True, exist_ok=True)
+
+    start = perf_counter()
+    found = 0
+    for square in squares:
+        # every square goes through the same checks as any other input, only the verdict is needed
+        if not is_magic_square(square):
+            Log.fatal(f"square {found + 1} is not a magic square")
+            exit(1)
+        found += 1
+
+        if options["out"] is not None:
+            with open(options["out"] / f"magic_square_{size}_{found}.txt", "w") as file:
+                file.write("".join(" ".join(map(str, row)) + " \n" for row in square))
+
+    Log.info(f"{found} magic squares of order {size} in {perf_counter() - start:.2f} s, all valid")
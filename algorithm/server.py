@@ -0,0 +1,220 @@
+"""
+long running validation server (python app.py --serve ADDRESS)
+
+listens on a tcp ("host:port" or "port") or unix ("unix:/path/to/socket") socket; every request and response is one line of JSON
+request: {"path": "square.txt"} or {"text": "8 1 6\n3 5 7\n4 9 2\n"} or {"msq": "<base64 of a .msq file>"}
+         optional keys: "id" (sent back as is), "backend" ("numpy" or "python"), "stream" (only with "path")
+response: {"id", "status" ("valid", "invalid", or "error"), "is_magic_square", "row_sums", "column_sums", "diagonal_sums",
+           "majority_sum", "majority_sum_count", "warnings", "error"}
+
+small squares are validated right in the event loop (a round trip to another process would take longer than the check itself),
+bigger ones are handed to a pool of worker processes that is started once and reused for every request
+"""
+import asyncio
+import json
+from base64 import b64decode
+from concurrent.futures import ProcessPoolExecutor
+from os import cpu_count
+from pathlib import Path
+
+from algorithm.backend import SMALL_SQUARE_BYTES
+from algorithm.worker import validate_in_worker, with_stats
+from utils.message import Log
+
+# a request line can hold a whole square, so lines are allowed to be much longer than asyncio's 64 KiB default
+MAX_REQUEST_BYTES = 1 << 30
+
+def parse_address(address: str) -> tuple[str, str, int|None]:
+    """
+    parses the argument of [--serve]
+    input: "unix:/path/to/socket", "host:port", or "port"
+
+    returns: ("unix", path, None) or ("tcp", host, port)
+    raises: ValueError if the address is not one of those
+    """
+    if address.startswith("unix:"):
+        return "unix", address[len("unix:"):], None
+
+    host, _, port = address.rpartition(":")
+    if not port.isdecimal():
+        raise ValueError(f"'{address}' is not a valid address. Please input 'unix:/path/to/socket', 'host:port', or 'port'")
+
+    return "tcp", host or "127.0.0.1", int(port)
+
+def validate_request(request: dict, backend: str|None=None, cache_dir: Path|None=None) -> dict:
+    """
+    validates the square of one request; this runs in the event loop for small squares and in a worker process for the rest
+    input: request (see the module docstring), backend name used when the request doesn't ask for one,
+    directory of the on-disk result cache (None for no cache)
+
+    a bad square is turned into an "error" response instead of stopping the server (see algorithm.worker.validate_in_worker)
+    returns: response dictionary (can be dumped as json)
+    """
+    try:
+        source = _request_source(request)
+    except ValueError as error:
+        return _error_response(request.get("id"), str(error))
+
+    result, error = validate_in_worker(source, request.get("backend") or backend, bool(request.get("stream")), cache_dir)
+    if result is None:
+        return _error_response(request.get("id"), error)
+
+    response = _error_response(request.get("id"))
+    response.update(result.to_dict())
+    response["status"] = "valid" if result.is_magic_square else "invalid"
+    return response
+
+def _error_response(request_id, error: str|None=None) -> dict:
+    'returns a response with every key, as if validation failed with error (filled in by validate_request when it succeeds)'
+    return {
+        "id": request_id,
+        "status": "error",
+        "is_magic_square": None,
+        "row_sums": None,
+        "column_sums": None,
+        "diagonal_sums": None,
+        "majority_sum": None,
+        "majority_sum_count": None,
+        "warnings": [],
+        "error": error,
+    }
+
+def _request_source(request: dict):
+    """
+    returns what validate takes for the square of a request: a Path, the bytes of a text file, or the bytes of a .msq file
+    raises: ValueError if the request has none (or more than one) of "path", "text", and "msq"
+    """
+    keys = [key for key in ["path", "text", "msq"] if key in request]
+    if len(keys) != 1:
+        raise ValueError("Please send exactly one of 'path', 'text', or 'msq'")
+
+    if "path" in request:
+        return Path(request["path"]).resolve()
+    if "text" in request:
+        return request["text"].encode()
+    return b64decode(request["msq"])
+
+def _check_request(request: dict):
+    """
+    checks the types of the keys of a request before anything is done with them
+    raises: ValueError if "path", "text", "msq", or "backend" is not a string, or "stream" is not a boolean
+    """
+    for key in ["path", "text", "msq"]:
+        if key in request and not isinstance(request[key], str):
+            raise ValueError(f"'{key}' must be a string")
+
+    if request.get("backend") is not None and not isinstance(request["backend"], str):
+        raise ValueError("'backend' must be a string")
+    if request.get("stream") is not None and not isinstance(request["stream"], bool):
+        raise ValueError("'stream' must be true or false")
+
+def _request_size(request: dict) -> int:
+    'returns about how many bytes the square of a request has (for files: the file size, 0 if it does not exist)'
+    if "path" in request:
+        path = Path(request["path"])
+        return path.stat().st_size if path.is_file() else 0
+    # base64 is 4 characters for every 3 bytes
+    return len(request.get("text", "")) + len(request.get("msq", "")) * 3 // 4
+
+class Validation_Server:
+    """
+    This class is the asyncio server behind [--serve].
+
+    Each connection can send any number of requests, one JSON line each, and gets one JSON line back per request in the same order.
+    Connections are served concurrently; the worker pool is created (and every worker started) before the first client connects.
+    """
+    def __init__(self, address: str, workers: int|None=None, backend: str|None=None, cache_dir: Path|None=None):
+        self._kind, self._host, self._port = parse_address(address)
+        self._workers = workers or cpu_count() or 1
+        self._backend = backend
+        self._cache_dir = cache_dir
+
+        self._pool: ProcessPoolExecutor|None = None
+        self.requests_served = 0
+
+    async def serve(self):
+        'starts the worker pool and the server, then serves until cancelled (eg. Ctrl+C)'
+        # workers record the stages of every request too when instrumentation is enabled, and hand them back with each response
+        self._pool = ProcessPoolExecutor(max_workers=self._workers, initializer=Log.enable_stats if Log.stats_enabled() else None)
+        # ProcessPoolExecutor starts workers lazily, warm them all up so the first big request doesn't pay for it
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[loop.run_in_executor(self._pool, int) for _ in range(self._workers)])
+
+        try:
+            if self._kind == "unix":
+                server = await asyncio.start_unix_server(self._handle, path=self._host, limit=MAX_REQUEST_BYTES)
+                Log.info(f"serving on unix:{self._host} with {self._workers} workers")
+            else:
+                server = await asyncio.start_server(self._handle, self._host, self._port, limit=MAX_REQUEST_BYTES)
+                Log.info(f"serving on {self._host}:{self._port} with {self._workers} workers")
+
+            async with server:
+                await server.serve_forever()
+        finally:
+            self._pool.shutdown(cancel_futures=True)
+            if self._kind == "unix":
+                Path(self._host).unlink(missing_ok=True)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        'serves one connection: reads a request line, writes its response line, until the client closes the connection'
+        try:
+            while line := await reader.readline():
+                response = await self._respond(line)
+                # the server never exits on its own, so the stages of every request are emitted once it is answered
+                Log.emit_stats()
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+                self.requests_served += 1
+
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError) as error:
+            # a client that disconnects (or sends a line that is too long) only ends its own connection
+            Log.warn(f"connection closed: {error}")
+
+        finally:
+            writer.close()
+
+    async def _respond(self, line: bytes) -> dict:
+        'validates the request of one line, in the event loop if its square is small, in the worker pool otherwise'
+        request = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("a request must be a JSON object")
+            _check_request(request)
+        except ValueError as error:
+            return _error_response(request.get("id") if isinstance(request, dict) else None, f"bad request: {error}")
+
+        # validate_request turns a bad square into an error response itself, this catches what happens before it gets there
+        # (eg. a path that can't be read) so the client still gets an answer instead of its connection being dropped
+        try:
+            if _request_size(request) <= SMALL_SQUARE_BYTES:
+                return validate_request(request, self._backend, self._cache_dir)
+
+            loop = asyncio.get_running_loop()
+            response, stages = await loop.run_in_executor(self._pool, with_stats, validate_request, request, self._backend, self._cache_dir)
+            Log.add_stats(stages)
+            return response
+
+        except Exception as error:
+            return _error_response(request.get("id"), f"{type(error).__name__}: {error}")
+
+def query(address: str, request: dict) -> dict:
+    """
+    sends one request to a running server and waits for its response (a small blocking client, eg. for scripts and checks)
+    input: address of the server (same format as [--serve]), request dictionary
+
+    returns: response dictionary
+    """
+    import socket
+
+    kind, host, port = parse_address(address)
+    if kind == "unix":
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.connect(host)
+    else:
+        connection = socket.create_connection((host, port))
+
+    with connection, connection.makefile("rwb") as file:
+        file.write(json.dumps(request).encode() + b"\n")
+        file.flush()
+        return json.loads(file.readline())
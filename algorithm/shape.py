@@ -0,0 +1,32 @@
+from algorithm.errors import Shape_Error
+
+def check_shape(row_count: int, column_count: int, name: str) -> list[str]:
+    """
+    checks if a row_count x column_count grid can be processed as a magic square
+    input: number of rows and columns, name of the square used in messages (eg. the file name)
+
+    non odd sided squares are only warned about since they can still be checked
+
+    returns: list of warning messages
+    raises: Shape_Error if the grid is empty or is odd sided but not a square
+    """
+    if row_count == 0 or column_count == 0:
+        raise Shape_Error(f"'{name}' is empty")
+
+    if row_count % 2 != 1 or column_count % 2 != 1:
+        return [f"'{name}' is not an odd sided square ({row_count}x{column_count})"]
+
+    elif row_count != column_count:
+        raise Shape_Error(f"'{name}' contains a {row_count}x{column_count} shape which is not a square")
+
+    return []
+
+def check_row_length(row_length: int, column_count: int, row_index: int, name: str):
+    """
+    checks if a row has as many values as the first row
+    input: number of values in the row, number of values in the first row, index of the row (0 based), name of the square used in messages
+
+    raises: Shape_Error if the row is ragged
+    """
+    if row_length != column_count:
+        raise Shape_Error(f"'{name}' row {row_index+1} has {row_length} values but the first row has {column_count}")
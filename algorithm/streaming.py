@@ -0,0 +1,222 @@
+from operator import add
+from pathlib import Path
+
+from algorithm.binary import is_binary, read_binary_rows, read_header
+from algorithm.cache import Result_Cache
+from algorithm.errors import Magic_Square_Error, Missing_File_Error, Parse_Error, Shape_Error
+from algorithm.result import Validation_Result
+from algorithm.shape import check_row_length, check_shape
+from algorithm.sums import find_majority_sum, log_majority_sum
+from utils.message import Log
+
+class Magic_Square_Stream:
+    """
+    This class checks if a magic square text file is a valid magic square while reading it one row at a time.
+
+    Unlike Magic_Square, the square itself is never held in memory. Only the row sums, the running column sums, and the 2 diagonal sums are kept, so peak memory is O(n) instead of O(n^2).
+
+    Ragged rows and non-square shapes are caught as soon as the offending row is read. Since nothing but the sums is kept, the square can't be printed.
+    """
+    def __init__(self, text_file: Path, cache: Result_Cache|None=None, trust_sums: bool=False):
+        self._text_file = text_file
+        # a cached result for the same file content skips reading the file at all (see algorithm.cache)
+        self._cache = cache
+        # the sums stored in the header of a .msq file are used as they are instead of reading its values (see stream_sums)
+        self._trust_sums = trust_sums
+
+        # _stream_sums modifies _row_sums, _column_sums, _diagonal_sums, and _cached_result
+        self._row_sums: list[int]
+        self._column_sums: list[int]
+        self._diagonal_sums: list[int]
+        self._cached_result: Validation_Result|None
+        self._stream_sums()
+
+        if self._cached_result is not None:
+            self._majority_sum, majority_sum_count = self._cached_result.majority_sum, self._cached_result.majority_sum_count
+        else:
+            self._majority_sum, majority_sum_count = find_majority_sum(self.sums)
+        log_majority_sum(self._majority_sum, majority_sum_count, self.total_counts)
+
+        # sums taken on trust are never cached, a later run that doesn't trust them would get them too
+        if self._cache is not None and self._cached_result is None and not self._trust_sums:
+            self._cache.put(self._cache_key, Validation_Result(
+                is_magic_square=self.is_magic_square,
+                row_sums=self.row_sums,
+                column_sums=self.column_sums,
+                diagonal_sums=self.diagonal_sums,
+                majority_sum=self._majority_sum,
+                majority_sum_count=majority_sum_count,
+                warnings=check_shape(self.row_count, self.column_count, self._text_file.name),
+            ))
+
+    @property
+    def is_magic_square(self) -> bool:
+        'returns true if the streamed square is a magic square'
+        return len(set(self.sums)) == 1
+
+    @property
+    def row_count(self) -> int:
+        'returns the number of rows'
+        return len(self._row_sums)
+
+    @property
+    def column_count(self) -> int:
+        'returns the number of columns'
+        return len(self._column_sums)
+
+    @property
+    def total_counts(self) -> int:
+        'returns the total count of rows, columns, and main 2 diagonals'
+        return self.row_count + self.column_count + 2
+
+    @property
+    def row_sums(self) -> list[int]:
+        'returns the sums for each row; top to bottom'
+        return self._row_sums
+
+    @property
+    def column_sums(self) -> list[int]:
+        'returns the sums for each column; left to right'
+        return self._column_sums
+
+    @property
+    def diagonal_sums(self) -> list[int]:
+        """
+        returns the sums for both diagonals
+        implied order: diagonal_1 '/', and diagonal_2 '\\'
+        """
+        return self._diagonal_sums
+
+    @property
+    def sums(self) -> list[int]:
+        """
+        returns all the sums for each row, column, and diagonal in a list
+        implied order: row_1, row_2, ..., row_n, column_1, column_2, ..., column_n, diagonal_1, and diagonal_2
+        """
+        return self.row_sums + self.column_sums + self.diagonal_sums
+
+    @property
+    def majority_sum(self) -> int|None:
+        'returns the sum that most rows, columns, and diagonals have; None if all sums are unique'
+        return self._majority_sum
+
+    def _stream_sums(self):
+        """
+        reads the text file one row at a time and adds each row into the running sums (see stream_sums)
+        or takes the sums straight from the cache if this file was already validated before
+
+        modifies: self._row_sums, self._column_sums, self._diagonal_sums, self._cached_result
+        """
+        try:
+            self._cached_result = None
+            if self._cache is not None:
+                if not self._text_file.is_file():
+                    raise Missing_File_Error(f"File not found: '{self._text_file}'")
+                self._cache_key = self._cache.key(self._text_file)
+                self._cached_result = self._cache.get(self._cache_key)
+
+            if self._cached_result is not None:
+                self._row_sums = self._cached_result.row_sums
+                self._column_sums = self._cached_result.column_sums
+                self._diagonal_sums = self._cached_result.diagonal_sums
+            else:
+                with Log.stage("stream") as stage:
+                    self._row_sums, self._column_sums, self._diagonal_sums = stream_sums(self._text_file, self._trust_sums)
+                    if Log.stats_enabled():
+                        stage.add(bytes_read=self._text_file.stat().st_size, cells=len(self._row_sums)*len(self._column_sums))
+
+        except Magic_Square_Error as error:
+            Log.fatal(str(error))
+            print("exiting...")
+            exit(1)
+
+        for warning in check_shape(self.row_count, self.column_count, self._text_file.name):
+            Log.warn(warning)
+
+    def print_verdict(self):
+        'prints whether the streamed square is a valid magic square (the same verdict print_magic_square starts with)'
+        if self.is_magic_square:
+            Log.info("valid magic square! all sums are equal")
+        else:
+            Log.fatal(f"invalid magic square!", end=" ")
+            if self._majority_sum:
+                print(f"some sums are not equal to '{self._majority_sum}'")
+            else:
+                print(r"all values are unique lol")
+
+def stream_sums(text_file: Path, trust_sums: bool=False) -> tuple[list[int], list[int], list[int]]:
+    """
+    reads a magic square text file (or .msq binary file) one row at a time and adds each row into running sums
+    input: Path to txt/msq file; whether to take the sums stored in the header of a .msq file as they are (see algorithm.binary)
+
+    the first row decides the size of the square, every row after that is checked against it right away
+    only the sums are kept in memory, never the rows
+    with trust_sums, a .msq file with stored sums is never read past its header, so values that don't match them go unnoticed
+
+    returns: (row_sums, column_sums, diagonal_sums)
+    raises: Missing_File_Error, Parse_Error, or Shape_Error (see algorithm.errors)
+    """
+    if not text_file.exists():
+        raise Missing_File_Error(f"File not found: '{text_file}'")
+
+    if trust_sums and is_binary(text_file):
+        try:
+            order, _, sums = read_header(text_file)
+        except ValueError as error:
+            raise Parse_Error(f"'{text_file.name}': {error}") from error
+        # an empty square has nothing to trust, it is rejected below like any other
+        if sums is not None and order:
+            return sums
+
+    row_sums = []
+    column_sums = []
+    diagonal_1_sum = 0
+    diagonal_2_sum = 0
+    size = 0
+
+    for i, row in enumerate(_read_rows(text_file)):
+        if i == 0:
+            if not row:
+                raise Shape_Error(f"'{text_file.name}' row 1 is empty")
+            size = len(row)
+            column_sums = [0]*size
+
+        check_row_length(len(row), size, i, text_file.name)
+
+        if i >= size:
+            raise Shape_Error(f"'{text_file.name}' has more than {size} rows which is not a square")
+
+        row_sums.append(sum(row))
+        column_sums = list(map(add, column_sums, row))
+        # first diagonal: /
+        diagonal_1_sum += row[size-1-i]
+        # second diagonal: \
+        diagonal_2_sum += row[i]
+
+    if len(row_sums) != size or size == 0:
+        check_shape(len(row_sums), size, text_file.name)
+        # even sided non squares only get a warning from check_shape, streaming can't check those
+        raise Shape_Error(f"'{text_file.name}' contains a {len(row_sums)}x{size} shape which is not a square")
+
+    return row_sums, column_sums, [diagonal_1_sum, diagonal_2_sum]
+
+def _read_rows(text_file: Path):
+    """
+    yields each row of a txt/msq file as a list of ints, one row at a time
+    input: Path to txt/msq file
+
+    raises: Parse_Error if a row can't be read
+    """
+    if is_binary(text_file):
+        try:
+            yield from read_binary_rows(text_file)
+        except ValueError as error:
+            raise Parse_Error(f"'{text_file.name}': {error}") from error
+        return
+
+    with open(text_file, "r") as file:
+        for i, line in enumerate(file):
+            try:
+                yield list(map(int, line.split()))
+            except ValueError as error:
+                raise Parse_Error(f"'{text_file.name}' row {i+1}: {error}") from error
@@ -0,0 +1,161 @@
+from collections import Counter
+from operator import add
+
+from algorithm.backend import is_array, np
+from utils.message import Log
+
+INT32_MAX = 2**31 - 1
+INT64_MAX = 2**63 - 1
+
+def compute_sums(lines: list[list[int]]) -> tuple[list[int], list[int], list[int]]:
+    """
+    computes the sum of every row, column, and both diagonals in a single pass over the grid
+    input: list of list of ints where each list is a row
+
+    column sums are kept as running accumulators that every row is added into,
+    so no column is ever walked on its own and no throwaway list is built per column
+
+    returns: (row_sums, column_sums, diagonal_sums)
+    implied order of diagonal_sums: diagonal_1 '/', and diagonal_2 '\\'
+    """
+    if is_array(lines):
+        return _compute_sums_numpy(lines)
+
+    row_sums = []
+    column_sums = [0]*len(lines[0])
+    diagonal_1_sum = 0
+    diagonal_2_sum = 0
+
+    for i, row in enumerate(lines):
+        row_sums.append(sum(row))
+        # map(add, ...) runs the element-wise addition in C instead of a python loop
+        column_sums = list(map(add, column_sums, row))
+
+        # the diagonals only go through the first min(row_count, column_count) rows, the same as ndarray.diagonal()
+        if i < len(row):
+            # first diagonal: /
+            diagonal_1_sum += row[len(row)-1-i]
+            # second diagonal: \
+            diagonal_2_sum += row[i]
+
+    return row_sums, column_sums, [diagonal_1_sum, diagonal_2_sum]
+
+def is_magic(lines: list[list[int]]) -> bool:
+    """
+    plain yes/no check if every row, column, and diagonal of the grid has the same sum
+    input: list of list of ints where each list is a row
+
+    same single pass as compute_sums but stops at the first row whose sum differs from the first row's sum
+    columns and diagonals can only be checked once every row has been added in
+    for arrays: the row sums are checked before the column sums are computed, and the column sums before the diagonals
+    """
+    if is_array(lines):
+        accumulator = sum_accumulator(lines)
+        if accumulator is None:
+            return is_magic(lines.tolist())
+
+        row_sums = lines.sum(axis=1, dtype=accumulator)
+        target = row_sums[0]
+        if not (row_sums == target).all() or not (lines.sum(axis=0, dtype=accumulator) == target).all():
+            return False
+        # first diagonal: / (fliplr makes it the main diagonal), second diagonal: \
+        return bool(np.fliplr(lines).diagonal().sum(dtype=accumulator) == target and lines.diagonal().sum(dtype=accumulator) == target)
+
+    target = sum(lines[0])
+    column_sums = [0]*len(lines[0])
+    diagonal_1_sum = 0
+    diagonal_2_sum = 0
+
+    for i, row in enumerate(lines):
+        if sum(row) != target:
+            return False
+
+        column_sums = list(map(add, column_sums, row))
+        if i < len(row):
+            diagonal_1_sum += row[len(row)-1-i]
+            diagonal_2_sum += row[i]
+
+    return (
+        all(column_sum == target for column_sum in column_sums)
+        and diagonal_1_sum == target
+        and diagonal_2_sum == target
+    )
+
+def sum_accumulator(grid) -> str|None:
+    """
+    picks the narrowest integer type every row, column, and diagonal sum of an array can be computed in without overflowing
+    input: 2d NumPy array
+
+    no line has more values than the longest side, so no sum is bigger (or smaller) than that many times the biggest value;
+    the range of the dtype alone settles it for narrow arrays (eg. .msq files of 1 or 2 byte values),
+    only arrays whose dtype could overflow int64 are scanned for their min and max (once)
+    int32 is only picked for values of 4 bytes or less, widening int64 values to sum them in int32 is slower than summing in int64
+    returns: "int32", "int64", or None if even int64 could overflow (the sums have to be python ints)
+    """
+    if grid.dtype.kind not in "iu":
+        return None
+    if grid.size == 0:
+        return "int64"
+
+    line_length = max(grid.shape)
+    info = np.iinfo(grid.dtype)
+    biggest = max(-int(info.min), int(info.max))
+
+    if biggest * line_length > INT64_MAX:
+        biggest = max(-int(grid.min()), int(grid.max()))
+
+    if grid.dtype.itemsize <= 4 and biggest * line_length <= INT32_MAX:
+        return "int32"
+    if biggest * line_length <= INT64_MAX:
+        return "int64"
+    return None
+
+def find_majority_sum(sums: list[int]) -> tuple[int|None, int]:
+    """
+    finds the sum that occurs the most among all row, column, and diagonal sums
+    input: list of every sum
+
+    returns: (majority_sum, majority_sum_count)
+    majority_sum is None if all sums are unique values (there is no majority at all)
+    """
+    # counter returns a dictionary-like string representation of {value:int} where value is the value in my iterable and int is the number of times it occured
+    majority_sum, majority_sum_count = Counter(sums).most_common(1)[0]
+
+    # most common sum only occuring once means every sum is unique
+    if majority_sum_count == 1:
+        majority_sum = None
+
+    return majority_sum, majority_sum_count
+
+def log_majority_sum(majority_sum: int|None, majority_sum_count: int, total_counts: int):
+    """
+    logs a [FATAL] message if there is no majority sum or if it is not more than half of all sums
+    input: output of find_majority_sum, total count of sums
+    """
+    if majority_sum is None:
+        Log.fatal("Interesting! All your sums are unique values. You basically achieved an anti-magic square. Congrats I guess")
+
+    elif not majority_sum_count > total_counts/2:
+        Log.fatal(f"No majority (>50%) sum found. The majority sum found is '{majority_sum}' which is only {(majority_sum_count/total_counts)*100}% ({majority_sum_count}) of the total count of sums present ({total_counts})")
+
+def _compute_sums_numpy(grid) -> tuple[list[int], list[int], list[int]]:
+    """
+    vectorized version of compute_sums for the numpy backend
+    input: 2d NumPy array
+
+    sums are accumulated in the narrowest type that can't overflow (see sum_accumulator); if none can, they are
+    computed with python ints instead, so a sum is never wrong just to be fast
+    sums are converted back to python ints so both backends give identical results
+    """
+    accumulator = sum_accumulator(grid)
+    if accumulator is None:
+        return compute_sums(grid.tolist())
+
+    row_sums = grid.sum(axis=1, dtype=accumulator).tolist()
+    column_sums = grid.sum(axis=0, dtype=accumulator).tolist()
+    # first diagonal: / (fliplr makes it the main diagonal)
+    diagonal_1_sum = int(np.fliplr(grid).diagonal().sum(dtype=accumulator))
+    # second diagonal: \
+    diagonal_2_sum = int(grid.diagonal().sum(dtype=accumulator))
+
+    return row_sums, column_sums, [diagonal_1_sum, diagonal_2_sum]
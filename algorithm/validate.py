@@ -0,0 +1,215 @@
+from io import StringIO
+from operator import index
+from pathlib import Path
+
+from algorithm.backend import is_array, pick_backend, to_grid
+from algorithm.binary import is_binary, read_binary
+from algorithm.errors import Missing_File_Error, Parse_Error, Shape_Error
+from algorithm.parser import read_square
+from algorithm.shape import check_row_length, check_shape
+from algorithm.sums import compute_sums, find_majority_sum, is_magic
+from utils.message import Log
+
+# only for annotations: algorithm.result imports dataclasses, which checking a small square never needs
+# (a plain constant instead of typing.TYPE_CHECKING, which would import typing)
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from algorithm.result import Validation_Result
+
+def load_grid(source, backend: str|None=None, name: str|None=None):
+    """
+    loads a magic square from a path, the text of a file, or a grid that is already in memory
+    input: Path/str to txt/msq file, bytes of the text/msq file, or list of list of ints/2d NumPy array;
+    backend name (None for the default, "python" for small squares); name used in messages (default: file name or '<bytes>'/'<grid>')
+
+    returns: (grid, warnings) where grid is in the representation of the backend
+    raises: Missing_File_Error, Parse_Error (also for a grid of anything but whole numbers), or Shape_Error (see algorithm.errors)
+    """
+    backend = pick_backend(backend, **_source_size(source))
+    name = name or _source_name(source)
+
+    if isinstance(source, (str, Path)):
+        text_file = Path(source)
+
+        if not text_file.is_file():
+            raise Missing_File_Error(f"File not found: '{text_file}'")
+
+        try:
+            grid = read_square(text_file, backend)
+        except ValueError as error:
+            raise Parse_Error(f"'{name}': {error}") from error
+
+    elif is_binary(source):
+        try:
+            grid = read_binary(source, backend)
+        except ValueError as error:
+            raise Parse_Error(f"'{name}': {error}") from error
+
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        try:
+            # iterating over a StringIO splits lines the same way iterating over a text file does
+            grid = [list(map(int, line.split())) for line in StringIO(bytes(source).decode(), newline=None)]
+        except (ValueError, UnicodeDecodeError) as error:
+            raise Parse_Error(f"'{name}': {error}") from error
+
+    else:
+        grid = source
+
+        if is_array(grid) and grid.ndim != 2:
+            raise Shape_Error(f"'{name}' is a {grid.ndim}d array, not a 2d grid")
+
+        # numpy would turn strings into ints and sum floats as floats, on either backend a grid has to hold whole numbers already
+        _check_integers(grid, name)
+
+    row_count = len(grid)
+    column_count = len(grid[0]) if row_count else 0
+
+    # arrays are always rectangular, lists of lists can have ragged rows
+    if not is_array(grid):
+        for i, row in enumerate(grid):
+            check_row_length(len(row), column_count, i, name)
+
+    warnings = check_shape(row_count, column_count, name)
+
+    return to_grid(grid, backend), warnings
+
+def validate(source, backend: str|None=None, stream: bool=False, cache=None, workers: int|None=None, index=None, trust_sums: bool=False) -> "Validation_Result":
+    """
+    checks if a magic square is valid without printing anything or exiting
+    this is the entry point for embedding the checker in another program; one process can call it as many times as needed
+    input: Path/str to txt/msq file, bytes of the text/msq file, or list of list of ints/2d NumPy array;
+    backend name (None for the default); whether to read a file one row at a time (see algorithm.streaming);
+    Result_Cache to look the result up in by content hash before computing anything (see algorithm.cache);
+    number of worker processes to split the sums of a large square across (None for one process, see algorithm.parallel);
+    Canonical_Index to add the square to before validating it (see algorithm.canonical);
+    whether to take the sums stored in a streamed .msq file as they are instead of reading its values (see algorithm.streaming.stream_sums)
+
+    returns: Validation_Result
+    raises: Missing_File_Error, Parse_Error, Shape_Error, or Duplicate_Square_Error (all subclasses of Magic_Square_Error)
+    """
+    if isinstance(source, (str, Path)) and not Path(source).is_file():
+        raise Missing_File_Error(f"File not found: '{source}'")
+
+    if trust_sums and not stream:
+        raise TypeError("stored sums are only trusted while streaming")
+
+    grid = None
+    if index is not None:
+        if stream:
+            raise TypeError("duplicates can't be found while streaming, it needs the whole square")
+
+        # a rotation or reflection of a square that was already indexed is skipped before anything else is done with it
+        grid, warnings = _load_grid_stage(source, backend)
+        index.check(grid, Path(source).as_posix() if isinstance(source, (str, Path)) else _source_name(source))
+
+    if cache is not None:
+        # files and bytes are looked up before they are parsed, a grid is checked first so only grids of integers are ever hashed
+        if grid is None and not isinstance(source, (str, Path, bytes, bytearray, memoryview)):
+            grid, warnings = _load_grid_stage(source, backend)
+        key = cache.key(source if isinstance(source, (str, Path, bytes, bytearray, memoryview)) else grid)
+        cached = cache.get(key)
+
+        if cached is not None:
+            from dataclasses import replace
+            # warnings mention the name of the square, which can differ between sources with the same content
+            return replace(cached, warnings=check_shape(len(cached.row_sums), len(cached.column_sums), _source_name(source)))
+
+    if stream:
+        if not isinstance(source, (str, Path)):
+            raise TypeError("only files can be streamed")
+
+        from algorithm.streaming import stream_sums
+        with Log.stage("stream") as stage:
+            row_sums, column_sums, diagonal_sums = stream_sums(Path(source), trust_sums)
+            if Log.stats_enabled():
+                stage.add(bytes_read=Path(source).stat().st_size, cells=len(row_sums)*len(column_sums))
+        warnings = check_shape(len(row_sums), len(column_sums), _source_name(source))
+
+    else:
+        if grid is None:
+            grid, warnings = _load_grid_stage(source, backend)
+        with Log.stage("sums", cells=len(grid)*len(grid[0])):
+            if workers:
+                from algorithm.parallel import parallel_sums
+                row_sums, column_sums, diagonal_sums = parallel_sums(grid, workers)
+            else:
+                row_sums, column_sums, diagonal_sums = compute_sums(grid)
+
+    sums = row_sums + column_sums + diagonal_sums
+    with Log.stage("majority", sums=len(sums)):
+        majority_sum, majority_sum_count = find_majority_sum(sums)
+
+    # imported here so load_grid (all that Magic_Square needs from this module) doesn't import dataclasses
+    from algorithm.result import Validation_Result
+
+    result = Validation_Result(
+        is_magic_square=len(set(sums)) == 1,
+        row_sums=row_sums,
+        column_sums=column_sums,
+        diagonal_sums=diagonal_sums,
+        majority_sum=majority_sum,
+        majority_sum_count=majority_sum_count,
+        warnings=warnings,
+    )
+
+    # sums taken on trust are never cached, a later call that doesn't trust them would get them too
+    if cache is not None and not trust_sums:
+        cache.put(key, result)
+
+    return result
+
+def is_magic_square(source, backend: str|None=None) -> bool:
+    """
+    plain yes/no check if a square is magic, for callers that don't need any sum (eg. a pass/fail gate)
+    input: same sources as validate; backend name (None for the default)
+
+    the square is read like validate reads it, then checked with is_magic, which stops at the first row whose sum is wrong
+    and never keeps the sums; there is no cache, index, or worker pool
+    returns: True if every row, column, and diagonal has the same sum
+    raises: Missing_File_Error, Parse_Error, or Shape_Error (all subclasses of Magic_Square_Error)
+    """
+    grid, _ = _load_grid_stage(source, backend)
+    with Log.stage("verdict", cells=len(grid)*len(grid[0])):
+        return is_magic(grid)
+
+def _load_grid_stage(source, backend: str|None):
+    'load_grid as the "read" stage of validate (see Log.stage)'
+    if not Log.stats_enabled():
+        return load_grid(source, backend)
+
+    with Log.stage("read", bytes_read=_source_size(source).get("byte_count", 0)) as stage:
+        grid, warnings = load_grid(source, backend)
+        stage.add(cells=len(grid)*len(grid[0]))
+    return grid, warnings
+
+def _check_integers(grid, name: str):
+    'raises Parse_Error if a grid from the caller holds anything but whole numbers (eg. floats or strings); arrays only by their dtype'
+    if is_array(grid):
+        if grid.dtype.kind not in "iu":
+            raise Parse_Error(f"'{name}' is an array of {grid.dtype}, not of whole numbers")
+        return
+
+    for i, row in enumerate(grid):
+        for value in row:
+            try:
+                index(value)
+            except TypeError:
+                raise Parse_Error(f"'{name}' row {i+1}: {value!r} is not a whole number") from None
+
+def _source_name(source) -> str:
+    'returns the name of a source used in messages: the file name, "<bytes>", or "<grid>"'
+    if isinstance(source, (str, Path)):
+        return Path(source).name
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return "<bytes>"
+    return "<grid>"
+
+def _source_size(source) -> dict[str, int]:
+    'returns how big a source is as arguments of pick_backend: the byte count of a file/bytes or the value count of a grid'
+    if isinstance(source, (str, Path)):
+        return {"byte_count": Path(source).stat().st_size} if Path(source).is_file() else {}
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return {"byte_count": len(source)}
+    if is_array(source):
+        return {"cell_count": source.size}
+    return {"cell_count": len(source) * len(source[0])} if len(source) else {}
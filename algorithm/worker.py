@@ -0,0 +1,42 @@
+"""
+what a worker process runs for every square it is handed, shared by batch mode (algorithm.batch) and the server (algorithm.server)
+"""
+from pathlib import Path
+
+from algorithm.cache import Result_Cache
+from algorithm.errors import Magic_Square_Error
+from algorithm.result import Validation_Result
+from algorithm.validate import validate
+from utils.message import Log
+
+# every worker process keeps one cache per cache directory for all the squares it validates
+_caches: dict[Path, Result_Cache] = {}
+
+def validate_in_worker(
+    source, backend: str|None=None, stream: bool=False, cache_dir: Path|None=None, trust_sums: bool=False,
+) -> tuple[Validation_Result|None, str|None]:
+    """
+    validates one square with the result cache this process keeps for cache_dir (see algorithm.validate.validate)
+    input: what validate takes for a square, backend name (None for the default), whether to read a file one row at a time,
+    directory of the on-disk result cache (None for no cache), whether to trust the sums stored in streamed .msq files
+
+    a square that can't be validated is turned into an error message instead of stopping the worker (and every square after it)
+    returns: (Validation_Result, None) or (None, error message)
+    """
+    if cache_dir is not None and cache_dir not in _caches:
+        _caches[cache_dir] = Result_Cache(directory=cache_dir)
+
+    try:
+        return validate(source, backend, stream, _caches.get(cache_dir), trust_sums=trust_sums), None
+
+    # eg. a bad file, or bytes asked to be streamed
+    except (Magic_Square_Error, ValueError, TypeError) as error:
+        return None, str(error)
+
+    # anything else is a bug, but one bad square still shouldn't stop the others
+    except Exception as error:
+        return None, f"{type(error).__name__}: {error}"
+
+def with_stats(function, *args) -> tuple:
+    'runs function(*args) in a worker process and returns what it returns with the stages it recorded (see Log.take_stats)'
+    return function(*args), Log.take_stats()
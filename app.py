@@ -1,7 +1,10 @@
 from pathlib import Path
 from sys import argv
 
-from algorithm.magic_square import Magic_Square
+# batch mode, streaming, and the cache are imported only when they are used so checking one small square starts fast
+# (python -m algorithm.benchmark --startup measures it)
+from algorithm.backend import BACKENDS, NUMPY_AVAILABLE
+from algorithm.binary import BINARY_SUFFIX
 from utils.message import Log
 
 class Args:
@@ -17,6 +20,19 @@ class Args:
             "file_path": None,
             "print_command": None,
             "size": None,
+            "backend": None,
+            "stream": None,
+            "trust_sums": None,
+            "batch": None,
+            "jobs": None,
+            "json_path": None,
+            "cache_dir": None,
+            "viewport": None,
+            "export_format": None,
+            "stats": None,
+            "serve": None,
+            "dedup_dir": None,
+            "diagnose": None,
         }
         self._parse_args()
         self._validate_args()
@@ -51,6 +67,42 @@ class Args:
                 self._args.update({"print_command":True})
                 continue
 
+            if arg in ["--stream"]:
+                # catch situations where there are multiple [--stream]
+                if self._args["stream"] is not None:
+                    Log.fatal("There are multiple [--stream] commands! Please only put one")
+                    exit(1)
+
+                self._args.update({"stream":True})
+                continue
+
+            if arg in ["--trust-sums"]:
+                # catch situations where there are multiple [--trust-sums]
+                if self._args["trust_sums"] is not None:
+                    Log.fatal("There are multiple [--trust-sums] commands! Please only put one")
+                    exit(1)
+
+                self._args.update({"trust_sums":True})
+                continue
+
+            if arg in ["--diagnose"]:
+                # catch situations where there are multiple [--diagnose]
+                if self._args["diagnose"] is not None:
+                    Log.fatal("There are multiple [--diagnose] commands! Please only put one")
+                    exit(1)
+
+                self._args.update({"diagnose":True})
+                continue
+
+            if arg in ["--stats"]:
+                # catch situations where there are multiple [--stats]
+                if self._args["stats"] is not None:
+                    Log.fatal("There are multiple [--stats] commands! Please only put one")
+                    exit(1)
+
+                self._args.update({"stats":True})
+                continue
+
             # put commands with mandatory arg after doing next(iter, None) so it doesn't mess up the order
             # put None as default value if there's no next iteration
             value = next(argv_iter, None)
@@ -66,11 +118,11 @@ class Args:
                     exit(1)
 
                 file = Path(value).resolve()
-                if file.is_file() and file.suffix == '.txt':
+                if file.is_file() and file.suffix in ['.txt', BINARY_SUFFIX]:
                     self._args.update({"file_path":file})
 
                 else:
-                    Log.fatal(f"'{file.as_posix()}' is not a valid path to a text file")
+                    Log.fatal(f"'{file.as_posix()}' is not a valid path to a text (.txt) or binary ({BINARY_SUFFIX}) file")
                     exit(1)
             
             elif arg in ["--size", "-s"]:
@@ -83,20 +135,167 @@ class Args:
                     Log.fatal(f"Please input an argument after '--size' or '-s'")
                     exit(1)
 
+                # odd and even sizes can both be generated, the minimum is checked in _validate_args
                 if value.isdecimal():
-                    value = int(value)
-                    
-                    if (value % 2) == 1:
-                        self._args.update({"size":value})
-
-                    else:
-                        Log.fatal(f"'{value}' is an even number. Please input an odd number (minimum: 3)")
-                        exit(1)
-                
+                    self._args.update({"size":int(value)})
+
                 else:
                     Log.fatal(f"'{value}' is not a valid size argument. Please avoid negative ('-') and decimal points ('.')")
                     exit(1)
 
+            elif arg in ["--backend", "-b"]:
+                # catch situations where there are multiple [--backend -b]
+                if self._args["backend"] is not None:
+                    Log.fatal("There are multiple [--backend -b] commands! Please only put one")
+                    exit(1)
+                # if there is no argument after the backend command
+                if value is None:
+                    Log.fatal(f"Please input an argument after '--backend' or '-b'")
+                    exit(1)
+
+                if value not in BACKENDS:
+                    Log.fatal(f"'{value}' is not a valid backend. Please input one of: {', '.join(BACKENDS)}")
+                    exit(1)
+
+                if value == "numpy" and not NUMPY_AVAILABLE:
+                    Log.fatal("The numpy backend needs NumPy to be installed (pip install numpy)")
+                    exit(1)
+
+                self._args.update({"backend":value})
+
+            elif arg in ["--batch"]:
+                # catch situations where there are multiple [--batch]
+                if self._args["batch"] is not None:
+                    Log.fatal("There are multiple [--batch] commands! Please only put one")
+                    exit(1)
+                # if there is no argument after the batch command
+                if value is None:
+                    Log.fatal(f"Please input a directory, glob, or comma separated list of files after '--batch'")
+                    exit(1)
+
+                from algorithm.batch import collect_files
+                files = collect_files(value)
+                if not files:
+                    Log.fatal(f"'{value}' does not match any text file")
+                    exit(1)
+
+                self._args.update({"batch":files})
+
+            elif arg in ["--jobs", "-j"]:
+                # catch situations where there are multiple [--jobs -j]
+                if self._args["jobs"] is not None:
+                    Log.fatal("There are multiple [--jobs -j] commands! Please only put one")
+                    exit(1)
+                # if there is no argument after the jobs command
+                if value is None:
+                    Log.fatal(f"Please input an argument after '--jobs' or '-j'")
+                    exit(1)
+
+                if value.isdecimal() and int(value) > 0:
+                    self._args.update({"jobs":int(value)})
+
+                else:
+                    Log.fatal(f"'{value}' is not a valid number of jobs. Please input a positive whole number")
+                    exit(1)
+
+            elif arg in ["--json"]:
+                # catch situations where there are multiple [--json]
+                if self._args["json_path"] is not None:
+                    Log.fatal("There are multiple [--json] commands! Please only put one")
+                    exit(1)
+                # if there is no argument after the json command
+                if value is None:
+                    Log.fatal(f"Please input an argument after '--json'")
+                    exit(1)
+
+                self._args.update({"json_path":Path(value).resolve()})
+
+            elif arg in ["--cache"]:
+                # catch situations where there are multiple [--cache]
+                if self._args["cache_dir"] is not None:
+                    Log.fatal("There are multiple [--cache] commands! Please only put one")
+                    exit(1)
+                # if there is no argument after the cache command
+                if value is None:
+                    Log.fatal(f"Please input a directory after '--cache'")
+                    exit(1)
+
+                cache_dir = Path(value).resolve()
+                if cache_dir.exists() and not cache_dir.is_dir():
+                    Log.fatal(f"'{cache_dir.as_posix()}' is not a directory")
+                    exit(1)
+
+                self._args.update({"cache_dir":cache_dir})
+
+            elif arg in ["--dedup"]:
+                # catch situations where there are multiple [--dedup]
+                if self._args["dedup_dir"] is not None:
+                    Log.fatal("There are multiple [--dedup] commands! Please only put one")
+                    exit(1)
+                # if there is no argument after the dedup command
+                if value is None:
+                    Log.fatal(f"Please input a directory after '--dedup'")
+                    exit(1)
+
+                dedup_dir = Path(value).resolve()
+                if dedup_dir.exists() and not dedup_dir.is_dir():
+                    Log.fatal(f"'{dedup_dir.as_posix()}' is not a directory")
+                    exit(1)
+
+                self._args.update({"dedup_dir":dedup_dir})
+
+            elif arg in ["--format"]:
+                # catch situations where there are multiple [--format]
+                if self._args["export_format"] is not None:
+                    Log.fatal("There are multiple [--format] commands! Please only put one")
+                    exit(1)
+                # if there is no argument after the format command
+                if value is None:
+                    Log.fatal(f"Please input an argument after '--format'")
+                    exit(1)
+
+                if value not in ["txt", "msq"]:
+                    Log.fatal(f"'{value}' is not a valid export format. Please input one of: txt, msq")
+                    exit(1)
+
+                self._args.update({"export_format":value})
+
+            elif arg in ["--serve"]:
+                # catch situations where there are multiple [--serve]
+                if self._args["serve"] is not None:
+                    Log.fatal("There are multiple [--serve] commands! Please only put one")
+                    exit(1)
+                # if there is no argument after the serve command
+                if value is None:
+                    Log.fatal(f"Please input an address after '--serve' ('unix:/path/to/socket', 'host:port', or 'port')")
+                    exit(1)
+
+                from algorithm.server import parse_address
+                try:
+                    parse_address(value)
+                except ValueError as error:
+                    Log.fatal(str(error))
+                    exit(1)
+
+                self._args.update({"serve":value})
+
+            elif arg in ["--viewport"]:
+                # catch situations where there are multiple [--viewport]
+                if self._args["viewport"] is not None:
+                    Log.fatal("There are multiple [--viewport] commands! Please only put one")
+                    exit(1)
+                # if there is no argument after the viewport command
+                if value is None:
+                    Log.fatal(f"Please input an argument after '--viewport'")
+                    exit(1)
+
+                if value.isdecimal() and int(value) > 0:
+                    self._args.update({"viewport":int(value)})
+
+                else:
+                    Log.fatal(f"'{value}' is not a valid viewport size. Please input a positive whole number")
+                    exit(1)
+
             else:
                 Log.fatal(f"'{arg}' is not a valid argument")
                 exit(1)
@@ -114,19 +313,136 @@ class Args:
                 "file_path": Path("./test_data/bad_data.txt").resolve(),
                 "print_command": True
                 })
+
+        # the server gets its squares from its clients
+        elif self._args["serve"] and any(self._args[arg] for arg in ["file_path", "size", "print_command", "batch", "stream", "json_path", "export_format", "viewport", "dedup_dir"]):
+            Log.fatal("[--serve] can only be used with [--jobs -j], [--backend -b], [--cache], and [--stats]")
+            exit(1)
+
+        # batch mode has its own files and runs on its own
+        elif self._args["batch"] and (self._args["file_path"] or self._args["size"] or self._args["print_command"]):
+            Log.fatal("[--batch] can't be used with [--file -f], [--size -s], or [--print -p]")
+            exit(1)
+
+        elif self._args["json_path"] and not self._args["batch"]:
+            Log.fatal("[--json] only works with [--batch]")
+            exit(1)
+
+        # the diagnosis only needs the sums of one file, and never prints the square
+        elif self._args["diagnose"] and any(self._args[arg] for arg in ["size", "print_command", "batch", "stream", "json_path", "cache_dir", "export_format", "viewport", "serve", "dedup_dir"]):
+            Log.fatal("[--diagnose] can only be used with [--file -f], [--backend -b], [--jobs -j], and [--stats]")
+            exit(1)
+
+        elif self._args["dedup_dir"] and not self._args["batch"]:
+            Log.fatal("[--dedup] only works with [--batch]")
+            exit(1)
+
+        # commands like [--print -p] or [--backend -b] alone still need something to process
+        elif self._args["file_path"] is None and self._args["size"] is None and self._args["batch"] is None and self._args["serve"] is None:
+            self._args.update({"file_path": Path("./test_data/bad_data.txt").resolve()})
         
         # only one of the two arguments must exist
         elif self._args["file_path"] and self._args["size"]:
             Log.fatal("Either pass an argument for [--file -f] or [--size -s], not both!")
             exit(1)
         
+        # streaming never holds the whole square so it can't print it, and only reads existing files
+        if self._args["stream"] and self._args["print_command"]:
+            Log.fatal("[--stream] does not keep the square in memory so it can't be printed. Please remove [--print -p]")
+            exit(1)
+
+        # finding rotations and reflections needs the whole square
+        if self._args["stream"] and self._args["dedup_dir"]:
+            Log.fatal("[--stream] does not keep the square in memory so it can't find duplicates. Please remove [--dedup]")
+            exit(1)
+
+        # outside of batch mode, jobs split the sums of one square, which streaming never holds
+        if self._args["stream"] and self._args["jobs"] and not self._args["batch"]:
+            Log.fatal("[--jobs -j] only works with [--stream] in [--batch] mode")
+            exit(1)
+
+        if self._args["stream"] and self._args["size"]:
+            Log.fatal("[--stream] only works with [--file -f], not [--size -s]")
+            exit(1)
+
+        # only streaming can skip the values of a file, everything else reads them anyway
+        if self._args["trust_sums"] and not self._args["stream"]:
+            Log.fatal("[--trust-sums] only works with [--stream]")
+            exit(1)
+
+        # only generated squares are exported
+        if self._args["export_format"] and not self._args["size"]:
+            Log.fatal("[--format] only works with [--size -s]")
+            exit(1)
+
+        # the viewport only changes what gets printed
+        if self._args["viewport"] and not self._args["print_command"]:
+            Log.fatal("[--viewport] only works with [--print -p]")
+            exit(1)
+
         if self._args["size"] is not None and self._args["size"] < 3:
             Log.fatal(f"Minimum number of sides is 3. '{self._args['size']}' is less than 3")
             exit(1)
 
 if __name__ == "__main__":
     test = Args(argv[1:])
+
+    # MAGIC_SQUARE_STATS turns instrumentation on too (see utils.message)
+    if test.args["stats"]:
+        Log.enable_stats()
+
+    if test.args["serve"]:
+        import asyncio
+        from algorithm.server import Validation_Server
+
+        server = Validation_Server(test.args["serve"], test.args["jobs"], test.args["backend"], test.args["cache_dir"])
+        try:
+            asyncio.run(server.serve())
+        except KeyboardInterrupt:
+            Log.info(f"server stopped after {server.requests_served} requests")
+        exit(0)
+
+    if test.args["batch"]:
+        from algorithm.batch import print_summary, validate_files, write_json_lines
+
+        results = validate_files(
+            test.args["batch"], test.args["jobs"], test.args["backend"], bool(test.args["stream"]), test.args["cache_dir"], test.args["dedup_dir"],
+            bool(test.args["trust_sums"]),
+        )
+        print_summary(results)
+
+        if test.args["json_path"]:
+            write_json_lines(results, test.args["json_path"])
+            Log.info(f"results written to '{test.args['json_path'].as_posix()}'")
+        exit(0)
+
+    if test.args["stream"]:
+        from algorithm.cache import Result_Cache
+        from algorithm.streaming import Magic_Square_Stream
+
+        cache = Result_Cache(directory=test.args["cache_dir"]) if test.args["cache_dir"] else None
+        Magic_Square_Stream(test.args["file_path"], cache, bool(test.args["trust_sums"])).print_verdict()
+        exit(0)
+
+    if test.args["diagnose"]:
+        from algorithm.diagnose import diagnose, log_diagnosis
+        from algorithm.errors import Magic_Square_Error
+
+        try:
+            diagnosis = diagnose(test.args["file_path"], test.args["backend"], test.args["jobs"])
+        except Magic_Square_Error as error:
+            Log.fatal(str(error))
+            exit(1)
+
+        for warning in diagnosis.warnings:
+            Log.warn(warning)
+        log_diagnosis(diagnosis, test.args["file_path"].name)
+        # a pass/fail gate: the exit code says whether the square is magic
+        exit(0 if diagnosis.is_magic_square else 1)
+
+    from algorithm.magic_square import Magic_Square
+
     magic = Magic_Square(test.args)
 
     if test.args["print_command"]:
-        magic.print_magic_square()
\ No newline at end of file
+        magic.print_magic_square(viewport=test.args["viewport"])
\ No newline at end of file
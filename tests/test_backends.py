@@ -0,0 +1,34 @@
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+from algorithm.backend import NUMPY_AVAILABLE
+from algorithm.magic_square import Magic_Square
+from algorithm.validate import validate
+from app import Args
+
+TEST_DATA = Path(__file__).resolve().parent.parent / "test_data"
+
+@unittest.skipUnless(NUMPY_AVAILABLE, "the numpy backend needs NumPy")
+class Backend_Test(unittest.TestCase):
+    'both backends give the same sums, colors, and printout for every square in test_data'
+    def test_same_results(self):
+        for text_file in sorted(TEST_DATA.glob("*.txt")):
+            with self.subTest(file=text_file.name):
+                self.assertEqual(validate(text_file, "python"), validate(text_file, "numpy"))
+
+    def test_same_printout(self):
+        for text_file in sorted(TEST_DATA.glob("*.txt")):
+            with self.subTest(file=text_file.name):
+                self.assertEqual(_printout(text_file, "python"), _printout(text_file, "numpy"))
+
+def _printout(text_file: Path, backend: str) -> str:
+    'returns everything app.py -f text_file -b backend -p prints (logs included)'
+    output = StringIO()
+    with redirect_stdout(output):
+        Magic_Square(Args(["-f", str(text_file), "-b", backend, "-p"]).args).print_magic_square(stream=output)
+    return output.getvalue()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import random
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from algorithm.backend import NUMPY_AVAILABLE
+from algorithm.editable import Editable_Magic_Square
+from algorithm.parser import read_square
+from algorithm.validate import validate
+from app import Args
+
+TEST_DATA = Path(__file__).resolve().parent.parent / "test_data"
+
+class Editable_Test(unittest.TestCase):
+    'after every random edit, the sums and verdict of an Editable_Magic_Square are the same as validating the edited square again'
+    def test_random_edits(self):
+        for backend in ["python", "numpy"] if NUMPY_AVAILABLE else ["python"]:
+            with self.subTest(backend=backend):
+                self._check_random_edits(TEST_DATA / "good_data.txt", backend, seed=1)
+
+    def test_random_edits_of_non_square(self):
+        # a 3x4 grid, where the / diagonal depends on the column count
+        with TemporaryDirectory() as directory:
+            text_file = Path(directory) / "wide.txt"
+            text_file.write_text("1 2 3 4\n5 6 7 8\n9 10 11 12\n")
+            self._check_random_edits(text_file, "python", seed=2)
+
+    def test_edit_outside_of_square(self):
+        square = _editable(TEST_DATA / "good_data.txt", "python")
+        for row, column in [(-1, 0), (0, -1), (square.row_count, 0), (0, square.column_count)]:
+            with self.subTest(row=row, column=column), self.assertRaises(IndexError):
+                square.set_value(row, column, 0)
+
+    def _check_random_edits(self, text_file: Path, backend: str, seed: int):
+        'makes 200 random edits (some of them beyond int64) and compares the square with a fresh validate after each one'
+        square = _editable(text_file, backend)
+        grid = [list(map(int, row)) for row in read_square(text_file, "python")]
+        generator = random.Random(seed)
+
+        for _ in range(200):
+            row, column = generator.randrange(square.row_count), generator.randrange(square.column_count)
+            value = generator.choice([generator.randint(-5, 120), grid[row][column], 2**70])
+            square.set_value(row, column, value)
+            grid[row][column] = value
+
+            expected = validate([row[:] for row in grid], "python")
+            edited = square.to_result()
+            self.assertEqual(edited.row_sums, expected.row_sums)
+            self.assertEqual(edited.column_sums, expected.column_sums)
+            self.assertEqual(edited.diagonal_sums, expected.diagonal_sums)
+            self.assertEqual(edited.is_magic_square, expected.is_magic_square)
+            # ties can be broken differently, but the majority sum always has the highest count
+            self.assertEqual(edited.majority_sum_count, expected.majority_sum_count)
+
+def _editable(text_file: Path, backend: str) -> Editable_Magic_Square:
+    'returns an Editable_Magic_Square of a file, without its logs'
+    with redirect_stdout(StringIO()):
+        return Editable_Magic_Square(Args(["-f", str(text_file), "-b", backend]).args)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from algorithm.backend import NUMPY_AVAILABLE, np
+from algorithm.binary import read_binary, write_binary
+from algorithm.parallel import PARALLEL_MIN_CELLS, parallel_sums
+from algorithm.sums import compute_sums
+
+@unittest.skipUnless(NUMPY_AVAILABLE, "parallel sums need NumPy")
+class Parallel_Test(unittest.TestCase):
+    'sums split across worker processes are exactly the sums of one process'
+    def test_array(self):
+        grid = _random_grid(np.int64, 2**40)
+        self.assertEqual(parallel_sums(grid, 2), compute_sums(grid))
+
+    def test_memory_mapped_file(self):
+        with TemporaryDirectory() as directory:
+            binary_file = Path(directory) / "square.msq"
+            write_binary(_random_grid(np.int8, 100), binary_file)
+            # 1 byte values are memory-mapped as they are, and every worker opens the file again
+            grid = read_binary(binary_file, "numpy")
+            self.assertEqual(parallel_sums(grid, 2), compute_sums(grid))
+            del grid
+
+def _random_grid(dtype, high: int):
+    'returns a square grid just big enough to be split across workers, with random values from -high to high'
+    size = int(PARALLEL_MIN_CELLS**0.5) + 1
+    return np.random.default_rng(0).integers(-high, high, size=(size, size), dtype=dtype, endpoint=True)
+
+if __name__ == "__main__":
+    unittest.main()
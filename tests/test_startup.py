@@ -0,0 +1,11 @@
+import unittest
+
+from algorithm.benchmark import check_startup, measure_startup
+
+class Startup_Test(unittest.TestCase):
+    'checking a 3x3 square from the command line stays within the startup budget (see algorithm.benchmark)'
+    def test_startup_budget(self):
+        self.assertEqual(check_startup(measure_startup(repeat=5)), [])
+
+if __name__ == "__main__":
+    unittest.main()
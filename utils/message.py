@@ -1,20 +1,90 @@
+import atexit
+import sys
+from io import TextIOBase
+from os import environ
+from pathlib import Path
+from time import perf_counter
+
+try:
+    # peak memory of the process, only on unix
+    import resource
+except ImportError:
+    resource = None
+
+# set to "1" to print a summary of every stage at exit, or to a path to append every stage as one JSON line to it instead
+STATS_ENVIRONMENT_VARIABLE = "MAGIC_SQUARE_STATS"
+
+class _Stage:
+    'one timed stage while instrumentation is enabled (see Log.stage)'
+    def __init__(self, name: str, counters: dict[str, int]):
+        self._record = {"stage": name, **counters}
+
+    def add(self, **counters: int):
+        'adds to the counters of the stage (eg. cells=100) while it is running'
+        for counter, value in counters.items():
+            self._record[counter] = self._record.get(counter, 0) + value
+
+    def __enter__(self):
+        # sys.getallocatedblocks is just a counter, tracing every allocation (tracemalloc) would make stages many times slower
+        self._blocks_before = sys.getallocatedblocks()
+        self._start = perf_counter()
+        return self
+
+    def __exit__(self, *exception):
+        seconds = perf_counter() - self._start
+
+        self._record.update({
+            "seconds": seconds,
+            # python memory blocks still allocated after the stage that weren't before it (negative if the stage freed some)
+            "allocated_blocks": sys.getallocatedblocks() - self._blocks_before,
+            # highest memory use of the whole process so far, not of this stage alone (None where it can't be measured)
+            "process_max_rss_bytes": _max_rss_bytes(),
+        })
+        Log._stats.append(self._record)
+
+def _max_rss_bytes() -> int|None:
+    'returns the peak resident memory of the process in bytes, None if the resource module is missing (windows)'
+    if resource is None:
+        return None
+    # linux reports kilobytes, macos bytes
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+class _Null_Stage:
+    'stands in for _Stage while instrumentation is disabled; does nothing'
+    def add(self, **counters: int):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        pass
+
+_NULL_STAGE = _Null_Stage()
+
 class Log:
     'A class for formatting log messages with ANSI colors'
     _default = "\033[0m"
     _yellow = "\033[93m"
     _red = "\033[91m"
 
+    # records of every finished stage, None while instrumentation is disabled (see enable_stats)
+    _stats: list[dict]|None = None
+    # JSON lines file the records are appended to, None to print an [INFO] summary instead
+    _stats_file: Path|None = None
+
     @classmethod
-    def info(cls, text: str, end: str="\n") -> str:
+    def info(cls, text: str, end: str="\n", file: TextIOBase|None=None) -> str:
         """
         [INFO]
         these typically provide non-critical information or updates about the program's execution
         they are meant to inform without indicating any issues or errors
         """
-        print(f"[INFO] {text}", end=end)
+        print(f"[INFO] {text}", end=end, file=file)
     
     @classmethod
-    def warn(cls, text: str, end: str="\n") -> str:
+    def warn(cls, text: str, end: str="\n", file: TextIOBase|None=None) -> str:
         """
         [WARN]
         these are used to alert users/developers about potential issues in the program.
@@ -22,10 +92,10 @@ class Log:
         """
         # ANSI escape code for yellow
         text_color = cls._yellow
-        print(f"{text_color}[WARN]{cls._default} {text}", end=end)
+        print(f"{text_color}[WARN]{cls._default} {text}", end=end, file=file)
     
     @classmethod
-    def fatal(cls, text: str, end: str="\n") -> str:
+    def fatal(cls, text: str, end: str="\n", file: TextIOBase|None=None) -> str:
         """
         [FATAL]
         these indicate severe issues that prevent the program from functioning correctly.
@@ -33,4 +103,80 @@ class Log:
         """
         # ANSI escape code for red
         text_color = cls._red
-        print(f"{text_color}[FATAL]{cls._default} {text}", end=end)
\ No newline at end of file
+        print(f"{text_color}[FATAL]{cls._default} {text}", end=end, file=file)
+
+    @classmethod
+    def enable_stats(cls, json_file: Path|None=None):
+        """
+        turns on instrumentation: every Log.stage records wall time, counters, allocated memory blocks, and the peak memory of the process so far
+        the records are emitted at exit (see emit_stats)
+        input: JSON lines file to append the records to, None to print an [INFO] summary instead
+        """
+        if cls._stats is None:
+            atexit.register(cls.emit_stats)
+        cls._stats = []
+        cls._stats_file = json_file
+
+    @classmethod
+    def stage(cls, name: str, **counters: int) -> _Stage|_Null_Stage:
+        """
+        times a block of code as one stage while instrumentation is enabled
+        input: stage name, counters known before the stage starts (eg. bytes_read=1024); more can be added with .add()
+
+        while instrumentation is disabled this only returns a shared object that does nothing
+        returns: context manager
+        """
+        if cls._stats is None:
+            return _NULL_STAGE
+        return _Stage(name, counters)
+
+    @classmethod
+    def stats_enabled(cls) -> bool:
+        'returns true if instrumentation is enabled (see enable_stats)'
+        return cls._stats is not None
+
+    @classmethod
+    def take_stats(cls) -> list[dict]:
+        """
+        returns the records of every stage so far and clears them, without emitting them
+        a worker process uses this to hand its stages back to the main process, which adds them with add_stats
+        returns: list of records (empty while instrumentation is disabled)
+        """
+        if not cls._stats:
+            return []
+        records, cls._stats = cls._stats, []
+        return records
+
+    @classmethod
+    def add_stats(cls, records: list[dict]):
+        'adds the records of stages that ran in another process (see take_stats); does nothing while instrumentation is disabled'
+        if cls._stats is not None:
+            cls._stats.extend(records)
+
+    @classmethod
+    def emit_stats(cls):
+        'prints (or appends as one JSON line) the records of every stage so far, then clears them'
+        if not cls._stats:
+            return
+
+        record = {"stages": cls._stats, "total_seconds": sum(stage["seconds"] for stage in cls._stats)}
+        cls._stats = []
+
+        if cls._stats_file is not None:
+            import json
+            with open(cls._stats_file, "a") as file:
+                file.write(json.dumps(record) + "\n")
+            return
+
+        for stage in record["stages"]:
+            counters = "".join(
+                f", {value} {counter.replace('_', ' ')}" for counter, value in stage.items()
+                if counter not in ["stage", "seconds", "process_max_rss_bytes"]
+            )
+            max_rss = "" if stage["process_max_rss_bytes"] is None else f", process peak memory {stage['process_max_rss_bytes']/1_000_000:.1f} MB"
+            cls.info(f"stats: {stage['stage']} took {stage['seconds']*1000:.2f} ms{counters}{max_rss}")
+        cls.info(f"stats: total {record['total_seconds']*1000:.2f} ms")
+
+# instrumentation can be turned on without touching the command, eg. MAGIC_SQUARE_STATS=stats.jsonl python app.py
+if environ.get(STATS_ENVIRONMENT_VARIABLE):
+    Log.enable_stats(None if environ[STATS_ENVIRONMENT_VARIABLE] == "1" else Path(environ[STATS_ENVIRONMENT_VARIABLE]).resolve())